@@ -0,0 +1,503 @@
+import audioop
+import logging
+import math
+import mmap
+import re
+import threading
+import time
+from collections import deque
+
+import discord
+
+logger = logging.getLogger('MusicBot')
+
+FRAME_MS = 20
+FRAME_SIZE = discord.opus.Encoder.FRAME_SIZE
+FRAME_SAMPLES = FRAME_SIZE // 2
+BYTES_PER_SECOND = 48000 * 2 * 2
+UNDERRUN_MS = 60
+MIN_GAIN_DB = -12.0
+MAX_GAIN_DB = 6.0
+UNITY_TOLERANCE = 0.06
+METER_GATE = 10 ** (-70 / 10)
+SILENCE = b'\x00' * FRAME_SIZE
+HTTP_GONE = re.compile(rb'(?:HTTP error|Server returned) (403|410)')
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return {
+        'count': len(ordered),
+        'p50_ms': ordered[len(ordered) // 2],
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        'max_ms': ordered[-1]
+    }
+
+
+def loudness_gain(lufs, target):
+    gain_db = min(MAX_GAIN_DB, max(MIN_GAIN_DB, target - lufs))
+    return 10 ** (gain_db / 20)
+
+
+class TrackTelemetry:
+    def __init__(self, start_sec=0):
+        self.start_sec = start_sec
+        self.frames = 0
+        self.underruns = 0
+        self.late_frames = 0
+        self.short_frames = 0
+        self.restarts = 0
+        self.read_ms = deque(maxlen=3000)
+
+    def rebase(self, seconds):
+        self.start_sec = seconds
+        self.frames = 0
+
+    def position(self):
+        return self.start_sec + self.frames * FRAME_MS / 1000
+
+    def observe(self, elapsed_ms, size, is_opus=False):
+        self.read_ms.append(elapsed_ms)
+        if not size:
+            return
+        self.frames += 1
+        if elapsed_ms > FRAME_MS:
+            self.late_frames += 1
+        if elapsed_ms >= UNDERRUN_MS:
+            self.underruns += 1
+        if not is_opus and size < FRAME_SIZE:
+            self.short_frames += 1
+
+    def summary(self):
+        return {
+            'position': self.position(),
+            'frames': self.frames,
+            'underruns': self.underruns,
+            'late_frames': self.late_frames,
+            'short_frames': self.short_frames,
+            'restarts': self.restarts,
+            'read': summarize(self.read_ms)
+        }
+
+
+class FFmpegErrorLog:
+    def __init__(self, limit=4096):
+        self.limit = limit
+        self.tail = bytearray()
+        self.status = None
+
+    def write(self, data):
+        match = HTTP_GONE.search(data)
+        if match:
+            self.status = int(match.group(1))
+        self.tail += data
+        del self.tail[:-self.limit]
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def text(self):
+        return self.tail.decode('utf-8', 'replace')
+
+
+class PrefetchedSource(discord.AudioSource):
+    def __init__(self, source, prebuffer_ms=400):
+        self.source = source
+        self.prebuffer_frames = max(1, prebuffer_ms // FRAME_MS)
+        self.buffer = deque()
+        self.exhausted = False
+
+    def prime(self):
+        while len(self.buffer) < self.prebuffer_frames:
+            data = self.source.read()
+            if not data:
+                self.exhausted = True
+                break
+            self.buffer.append(data)
+        return len(self.buffer)
+
+    def read(self):
+        if self.buffer:
+            return self.buffer.popleft()
+        if self.exhausted:
+            return b''
+        return self.source.read()
+
+    @property
+    def seekable(self):
+        return getattr(self.source, 'seekable', False)
+
+    @property
+    def error_log(self):
+        return getattr(self.source, 'error_log', None)
+
+    def seek(self, seconds):
+        self.buffer.clear()
+        self.exhausted = False
+        self.source.seek(seconds)
+
+    def is_opus(self):
+        return self.source.is_opus()
+
+    def cleanup(self):
+        self.buffer.clear()
+        self.source.cleanup()
+
+
+class MmapPCMSource(discord.AudioSource):
+    seekable = True
+
+    def __init__(self, path, start_sec=0):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self.size = len(self._map)
+        self.pos = 0
+        self.seek(start_sec)
+
+    def seek(self, seconds):
+        frame = int(max(0, seconds) * 1000) // FRAME_MS
+        self.pos = min(frame * FRAME_SIZE, self.size)
+
+    def position(self):
+        return self.pos / BYTES_PER_SECOND
+
+    def read(self):
+        pos = self.pos
+        if pos >= self.size:
+            return b''
+        self.pos = pos + FRAME_SIZE
+        return self._map[pos:pos + FRAME_SIZE]
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        try:
+            self._map.close()
+        except Exception:
+            pass
+        self._file.close()
+
+
+class GainStage:
+    def apply(self, data, gain):
+        return audioop.mul(data, 2, gain)
+
+    def mix(self, old, old_gain, new, new_gain):
+        old = audioop.mul(old, 2, old_gain)
+        if not new:
+            return old
+        return audioop.add(old, audioop.mul(new, 2, new_gain), 2)
+
+
+class LoudnessMeter:
+    def __init__(self, window_ms=3000, warmup_ms=1000):
+        self._alpha = FRAME_MS / window_ms
+        self._warmup = max(1, warmup_ms // FRAME_MS)
+        self.reset()
+
+    def reset(self):
+        self.mean_square = 0.0
+        self.frames = 0
+
+    def observe(self, data):
+        mean_square = (audioop.rms(data, 2) / 32768) ** 2
+        if mean_square < METER_GATE:
+            return
+        if self.frames == 0:
+            self.mean_square = mean_square
+        else:
+            self.mean_square += self._alpha * (mean_square - self.mean_square)
+        self.frames += 1
+
+    def lufs(self):
+        if self.frames < self._warmup:
+            return None
+        return 10 * math.log10(self.mean_square) - 0.691
+
+
+class MixerSource(discord.AudioSource):
+    def __init__(self, volume=1.0, loudness_target=None, duck_db=-12.0, attack_ms=80, release_ms=400):
+        self._lock = threading.Lock()
+        self.volume = volume
+        self.loudness_target = loudness_target
+        self.current = None
+        self.telemetry = None
+        self.track_gain = None
+        self.meter = LoudnessMeter()
+        self._gain = GainStage()
+        self._after = None
+        self._on_start = None
+        self.staged = None
+        self._staged_after = None
+        self._staged_gain = None
+        self.fading = None
+        self._fading_gain = 1.0
+        self._fade_total = 0
+        self._fade_pos = 0
+        self.overlay = None
+        self._overlay_after = None
+        self._overlay_on_start = None
+        self._overlays = deque()
+        self.held = False
+        self.duck_gain = 10 ** (duck_db / 20)
+        self._duck = 1.0
+        self._attack_step = (1.0 - self.duck_gain) / max(1, attack_ms // FRAME_MS)
+        self._release_step = (1.0 - self.duck_gain) / max(1, release_ms // FRAME_MS)
+        self._decoders = {}
+        self._opus_out = False
+        self.passthrough_frames = 0
+        self.decoded_frames = 0
+
+    def is_active(self):
+        return self.current is not None or self.fading is not None
+
+    def is_speaking(self):
+        return self.overlay is not None
+
+    def add_overlay(self, source, after=None, on_start=None):
+        with self._lock:
+            if self.overlay is None:
+                self.overlay, self._overlay_after, self._overlay_on_start = source, after, on_start
+                return 0
+            self._overlays.append((source, after, on_start))
+            return len(self._overlays)
+
+    def clear_overlays(self):
+        with self._lock:
+            retired = [self.overlay] + [entry[0] for entry in self._overlays]
+            self._overlays.clear()
+            self.overlay = self._overlay_after = self._overlay_on_start = None
+            self.held = False
+        self._retire(retired)
+
+    def _next_overlay(self):
+        if self._overlays:
+            self.overlay, self._overlay_after, self._overlay_on_start = self._overlays.popleft()
+        else:
+            self.overlay = self._overlay_after = self._overlay_on_start = None
+
+    def _read_overlay(self):
+        finished = []
+        while self.overlay is not None:
+            voice = self.overlay.read()
+            if voice:
+                if self.overlay.is_opus():
+                    voice = self._decode(self.overlay, voice)
+                started, self._overlay_on_start = self._overlay_on_start, None
+                return voice.ljust(FRAME_SIZE, b'\x00'), started, finished
+            finished.append((self.overlay, self._overlay_after))
+            self._next_overlay()
+        return b'', None, finished
+
+    def _step_duck(self):
+        if self.overlay is not None:
+            self._duck = max(self.duck_gain, self._duck - self._attack_step)
+        else:
+            self._duck = min(1.0, self._duck + self._release_step)
+        return self._duck
+
+    def play(self, source, after=None, fade_ms=0, on_start=None, start_sec=0, telemetry=None, gain=None):
+        retired = []
+        ended = None
+        with self._lock:
+            if source is self.current:
+                self._after = after
+                self.track_gain = gain
+                if on_start:
+                    on_start()
+                return
+            if source is self.staged:
+                self.staged = None
+                self._staged_after = None
+                self._staged_gain = None
+            if fade_ms > 0 and self.current is not None:
+                retired.append(self.fading)
+                self.fading = self.current
+                self._fading_gain = self._current_gain()
+                self._fade_total = max(1, fade_ms // FRAME_MS)
+                self._fade_pos = 0
+            else:
+                retired.append(self.current)
+            if telemetry is None:
+                ended = self.telemetry
+                telemetry = TrackTelemetry(start_sec)
+                self.meter.reset()
+            else:
+                telemetry.restarts += 1
+                telemetry.rebase(start_sec)
+            self.current = source
+            self.telemetry = telemetry
+            self.track_gain = gain
+            self._after = after
+            self._on_start = on_start
+        self._retire(retired, ended=ended)
+
+    def seek(self, seconds):
+        with self._lock:
+            if self.current is None:
+                return False
+            self.current.seek(seconds)
+            if self.telemetry is not None:
+                self.telemetry.rebase(seconds)
+        return True
+
+    def position(self):
+        telemetry = self.telemetry
+        return telemetry.position() if telemetry is not None else None
+
+    def stage(self, source, after=None, gain=None):
+        with self._lock:
+            retired = [self.staged] if self.staged is not source else []
+            self.staged = source
+            self._staged_after = after
+            self._staged_gain = gain
+        self._retire(retired)
+
+    def _current_gain(self):
+        if self.track_gain is not None:
+            return self.track_gain
+        if self.loudness_target is None:
+            return 1.0
+        lufs = self.meter.lufs()
+        return 1.0 if lufs is None else loudness_gain(lufs, self.loudness_target)
+
+    def stop(self):
+        with self._lock:
+            retired = [self.current, self.staged, self.fading]
+            ended = self.telemetry
+            self.current = self.staged = self.fading = None
+            self.telemetry = self.track_gain = self._staged_gain = None
+            self._after = self._staged_after = self._on_start = None
+        self._retire(retired, ended=ended)
+
+    def _read_current(self):
+        started = time.perf_counter()
+        data = self.current.read()
+        self.telemetry.observe((time.perf_counter() - started) * 1000, len(data), self.current.is_opus())
+        return data
+
+    def read(self):
+        finished = None
+        ended = None
+        retired = []
+        with self._lock:
+            held = self.held
+            ducking = self.overlay is not None or self._duck < 1.0
+            data = self._read_current() if self.current and not held else b''
+            if self.current is not None and not data and not held:
+                finished = self._after
+                ended = self.telemetry
+                retired.append(self.current)
+                self.current, self._after = self.staged, self._staged_after
+                self.telemetry = TrackTelemetry() if self.current else None
+                self.track_gain = self._staged_gain
+                self.staged = self._staged_after = self._staged_gain = None
+                self.meter.reset()
+                data = self._read_current() if self.current else b''
+            on_start = self._on_start if data else None
+            if on_start:
+                self._on_start = None
+            packet_is_opus = bool(data) and self.current.is_opus()
+            gain = self.volume * self._current_gain()
+            passthrough = packet_is_opus and self.fading is None and not ducking and abs(gain - 1.0) < UNITY_TOLERANCE
+            if packet_is_opus and not passthrough:
+                data = self._decode(self.current, data)
+            if data and not passthrough and len(data) < FRAME_SIZE:
+                data = data.ljust(FRAME_SIZE, b'\x00')
+            if data and not packet_is_opus and self.track_gain is None and self.loudness_target is not None:
+                self.meter.observe(data)
+            mixed = False
+            if self.fading is not None:
+                old = self.fading.read()
+                if old and self.fading.is_opus():
+                    old = self._decode(self.fading, old)
+                self._fade_pos += 1
+                if old:
+                    t = min(1.0, self._fade_pos / self._fade_total)
+                    old_gain = self.volume * self._fading_gain * (1.0 - t)
+                    data = self._gain.mix(old.ljust(FRAME_SIZE, b'\x00'), old_gain, data, gain * t)
+                    mixed = True
+                if not old or self._fade_pos >= self._fade_total:
+                    retired.append(self.fading)
+                    self.fading = None
+            voice, voice_started, spoken = self._read_overlay() if ducking else (b'', None, [])
+            duck = self._step_duck() if ducking else 1.0
+            self._opus_out = passthrough
+        if on_start:
+            on_start()
+        if voice_started:
+            voice_started()
+        for source, after in spoken:
+            self._retire([source], after)
+        if retired or finished:
+            self._retire(retired, finished, ended)
+        if passthrough:
+            self.passthrough_frames += 1
+            return data
+        if packet_is_opus:
+            self.decoded_frames += 1
+        music_gain = (1.0 if mixed else gain) * duck
+        if voice:
+            if data:
+                return self._gain.mix(data, music_gain, voice, self.volume)
+            return self._gain.apply(voice, self.volume)
+        if not data:
+            return SILENCE
+        if music_gain != 1.0:
+            data = self._gain.apply(data, music_gain)
+        return data
+
+    def _decode(self, source, packet):
+        decoder = self._decoders.get(id(source))
+        if decoder is None:
+            decoder = self._decoders[id(source)] = discord.opus.Decoder()
+        return decoder.decode(packet)
+
+    def _retire(self, sources, after=None, ended=None):
+        if ended is not None and ended.frames:
+            self._log_telemetry(ended)
+        sources = [s for s in sources if s is not None]
+        if not sources and not after:
+            return
+        for source in sources:
+            self._decoders.pop(id(source), None)
+
+        def run():
+            for source in sources:
+                try:
+                    source.cleanup()
+                except Exception as e:
+                    logger.error(f"Kaynak temizleme hatası: {e}")
+            if after:
+                try:
+                    after(None)
+                except Exception as e:
+                    logger.error(f"Mikser callback hatası: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def _log_telemetry(self, telemetry):
+        summary = telemetry.summary()
+        read = summary['read'] or {'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0, 'max_ms': 0}
+        logger.info(
+            f"📊 Parça telemetrisi: {summary['frames']} kare | "
+            f"underrun {summary['underruns']}, geç {summary['late_frames']}, eksik {summary['short_frames']}, "
+            f"ffmpeg yeniden başlatma {summary['restarts']} | "
+            f"okuma p50 {read['p50_ms']:.2f}ms p95 {read['p95_ms']:.2f}ms p99 {read['p99_ms']:.2f}ms max {read['max_ms']:.1f}ms"
+        )
+
+    def is_opus(self):
+        return self._opus_out
+
+    def cleanup(self):
+        self.stop()
+        self.clear_overlays()
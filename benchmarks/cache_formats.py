@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+import argparse
+import resource
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from audio import MixerSource
+
+
+def cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def run(label, source, frames, volume, encoder):
+    mixer = MixerSource(volume=volume)
+    mixer.play(source)
+    started_cpu = cpu_seconds()
+    started = time.perf_counter()
+    sent = 0
+    for _ in range(frames):
+        data = mixer.read()
+        if not mixer.is_active():
+            break
+        if not mixer.is_opus():
+            encoder.encode(data, encoder.SAMPLES_PER_FRAME)
+        sent += 1
+    source.cleanup()
+    wall = time.perf_counter() - started
+    cpu = cpu_seconds() - started_cpu
+    per_frame_us = (cpu / sent * 1e6) if sent else 0.0
+    audio_seconds = sent * 0.02
+    print(f"{label:<28} {sent:>6} kare  cpu {cpu:6.2f}s  {per_frame_us:8.1f}µs/kare  "
+          f"akış başına %{(cpu / audio_seconds * 100) if audio_seconds else 0:5.2f} CPU  duvar {wall:5.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MP3 (decode+volume+encode) ve Opus passthrough cache yollarının CPU karşılaştırması")
+    parser.add_argument('mp3', help="MP3 cache dosyası")
+    parser.add_argument('opus', help="Ogg Opus cache dosyası")
+    parser.add_argument('--ffmpeg', default=os.getenv('FFMPEG_PATH', 'ffmpeg'))
+    parser.add_argument('--frames', type=int, default=3000)
+    args = parser.parse_args()
+    if not discord.opus.is_loaded():
+        discord.opus._load_default()
+    encoder = discord.opus.Encoder()
+    run("mp3 → pcm → ses → opus", discord.FFmpegPCMAudio(args.mp3, executable=args.ffmpeg), args.frames, 0.8, encoder)
+    run("opus → pcm → ses → opus", discord.FFmpegOpusAudio(args.opus, executable=args.ffmpeg, codec='copy'), args.frames, 0.8, encoder)
+    run("opus passthrough", discord.FFmpegOpusAudio(args.opus, executable=args.ffmpeg, codec='copy'), args.frames, 1.0, encoder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from favorites import FavoritesStore
+
+
+def url_for(index):
+    return f"https://www.youtube.com/watch?v={index:011d}"
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def legacy_add(path, favorites, index):
+    url = url_for(index)
+    if any(f.get('url') == url for f in favorites):
+        return
+    favorites.append({'title': f"Şarkı {index}", 'url': url, 'duration': 200})
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(favorites, f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eski tam yeniden yazma ile günlüklü favori deposunu karşılaştırır")
+    parser.add_argument('--favorites', type=int, default=10000)
+    parser.add_argument('--adds', type=int, default=200, help="Dolu listeye art arda eklenecek favori sayısı")
+    parser.add_argument('--lookups', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seed = [{'title': f"Şarkı {i}", 'url': url_for(i), 'duration': 200} for i in range(args.favorites)]
+        legacy_path = os.path.join(tmp, 'legacy.json')
+        store_path = os.path.join(tmp, 'favorites.json')
+        for path in (legacy_path, store_path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(seed, f, ensure_ascii=False, indent=2)
+
+        print(f"{args.favorites} favori, {args.adds} ekleme\n")
+        legacy = list(seed)
+        new_ids = range(args.favorites, args.favorites + args.adds)
+        legacy_ms, _ = timed(lambda: [legacy_add(legacy_path, legacy, i) for i in new_ids])
+        load_ms, store = timed(lambda: FavoritesStore(store_path, compact_every=args.adds * 2 + 1))
+        store_ms, _ = timed(lambda: [store.add(url_for(i), f"Şarkı {i}", 200) for i in new_ids])
+        print(f"ekleme (eski, tam yeniden yazma)  {legacy_ms / args.adds:9.3f} ms/işlem")
+        print(f"ekleme (günlük + fsync)           {store_ms / args.adds:9.3f} ms/işlem   {legacy_ms / max(store_ms, 1e-9):.1f}x")
+
+        probes = [url_for(i * 7919 % (args.favorites + args.adds)) for i in range(args.lookups)]
+        scan_ms, _ = timed(lambda: [next((f for f in legacy if f.get('url') == url), None) for url in probes[:200]])
+        index_ms, _ = timed(lambda: [store.get(url) for url in probes])
+        print(f"arama (liste taraması)            {scan_ms / 200 * 1000:9.1f} µs/işlem")
+        print(f"arama (sözlük indeksi)            {index_ms / args.lookups * 1000:9.1f} µs/işlem")
+
+        remove_ms, _ = timed(lambda: [store.remove(url_for(i)) for i in new_ids])
+        print(f"silme (günlük)                    {remove_ms / args.adds:9.3f} ms/işlem")
+
+        journal = os.path.getsize(store.journal_path)
+        replay_ms, reopened = timed(lambda: FavoritesStore(store_path))
+        compact_ms, _ = timed(store.compact)
+        print(f"\nilk yükleme                       {load_ms:9.1f} ms")
+        print(f"günlük yeniden oynatma + sıkıştırma {replay_ms:7.1f} ms ({journal / 1024:.0f} KB günlük)")
+        print(f"sıkıştırma (atomik yazma)         {compact_ms:9.1f} ms")
+        assert len(reopened) == args.favorites and not os.path.exists(store.journal_path)
+        store.close()
+        reopened.close()
+
+
+if __name__ == "__main__":
+    main()
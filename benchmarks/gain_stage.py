@@ -0,0 +1,73 @@
+import os
+import sys
+import time
+import random
+import argparse
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from audio import FRAME_SIZE, FRAME_SAMPLES, GainStage, LoudnessMeter
+
+
+class FrameSource(discord.AudioSource):
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+
+    def read(self):
+        data = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return data
+
+    def is_opus(self):
+        return False
+
+
+def synthetic_frames(count=50, seed=7):
+    rng = random.Random(seed)
+    return [array('h', (rng.randint(-12000, 12000) for _ in range(FRAME_SAMPLES))).tobytes() for _ in range(count)]
+
+
+def run(label, read, frames):
+    started_cpu = time.process_time()
+    started = time.perf_counter()
+    for _ in range(frames):
+        read()
+    cpu = time.process_time() - started_cpu
+    wall = time.perf_counter() - started
+    print(f"{label:<34} {frames:>7} kare  cpu {cpu:6.3f}s  {cpu / frames * 1e6:7.2f}µs/kare  duvar {wall:6.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PCMVolumeTransformer ile mikserin GainStage ve LoudnessMeter katmanlarının kare başına CPU karşılaştırması")
+    parser.add_argument('--frames', type=int, default=50000)
+    parser.add_argument('--gain', type=float, default=0.8)
+    args = parser.parse_args()
+    frames = synthetic_frames()
+    assert all(len(f) == FRAME_SIZE for f in frames)
+
+    try:
+        transformer = discord.PCMVolumeTransformer(FrameSource(frames), volume=args.gain)
+        run("PCMVolumeTransformer (audioop)", transformer.read, args.frames)
+    except Exception as e:
+        print(f"PCMVolumeTransformer kullanılamıyor: {e}")
+
+    source = FrameSource(frames)
+    stage = GainStage()
+    run("GainStage", lambda: stage.apply(source.read(), args.gain), args.frames)
+
+    source = FrameSource(frames)
+    meter = LoudnessMeter()
+
+    def metered():
+        data = source.read()
+        meter.observe(data)
+        return stage.apply(data, args.gain)
+
+    run("GainStage + LoudnessMeter", metered, args.frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex, FAVORITE, CACHE, HISTORY
+
+SYLLABLES = ("ka la me ri so tu na de bo ya şa gü lü çi ör ne ze ha mo pa ru si te ve yo ba ci "
+             "an el in on ur ek ıl ov str bl tr gh ph ck ng rs wa wo fi fu ja jo ke ky ox ix qu zz").split()
+SUFFIXES = ("", " (Official Video)", " (Lyrics)", " - Live", " [Remix]", " ft. Ozan", " | Akustik")
+
+
+def word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def synthetic_titles(count, seed):
+    rng = random.Random(seed)
+    artists = [" ".join(word(rng).capitalize() for _ in range(rng.randint(1, 2))) for _ in range(max(count // 20, 1))]
+    for index in range(count):
+        song = " ".join(word(rng) for _ in range(rng.randint(1, 4))).title()
+        yield f"https://www.youtube.com/watch?v={index:011d}", f"{rng.choice(artists)} - {song}{rng.choice(SUFFIXES)}"
+
+
+def typo(text, rng):
+    if len(text) < 4:
+        return text
+    i = rng.randrange(1, len(text) - 2)
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def queries(titles, rng, count):
+    for _ in range(count):
+        _, title = rng.choice(titles)
+        words = title.replace('-', ' ').split()[:3]
+        kind = rng.choice(('tam', 'önek', 'yazım hatası'))
+        if kind == 'önek':
+            for end in range(1, len(" ".join(words)) + 1):
+                yield kind, " ".join(words)[:end]
+        elif kind == 'yazım hatası':
+            yield kind, " ".join(typo(w, rng) for w in words)
+        else:
+            yield kind, " ".join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Favoriler, cache ve geçmiş üzerinde yerel aramanın tuş başına gecikmesini ölçer")
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--budget-ms', type=float, default=10.0)
+    args = parser.parse_args()
+
+    titles = list(synthetic_titles(args.entries, args.seed))
+    rng = random.Random(args.seed)
+    index = SearchIndex()
+    started = time.perf_counter()
+    for url, title in titles:
+        index.add(url, title, rng.choice((FAVORITE, CACHE, HISTORY)))
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"{args.entries} kayıt indekslendi: {build_ms:.0f}ms ({index.stats()['grams']} trigram)\n")
+
+    timings = {}
+    found = {}
+    for kind, query in queries(titles, rng, args.queries):
+        started = time.perf_counter()
+        results = index.search(query)
+        timings.setdefault(kind, []).append((time.perf_counter() - started) * 1000)
+        found.setdefault(kind, []).append(bool(results))
+    worst = 0.0
+    for kind, samples in timings.items():
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        worst = max(worst, p99)
+        hit = sum(found[kind]) / len(found[kind]) * 100
+        print(f"{kind:<14} {len(samples):6d} sorgu  medyan {statistics.median(samples):6.2f}ms  p99 {p99:6.2f}ms  maks {samples[-1]:6.2f}ms  sonuç %{hit:.0f}")
+
+    url, title = titles[0]
+    started = time.perf_counter()
+    index.rename(url, title + " yeni")
+    index.discard(titles[1][0], FAVORITE)
+    index.add("https://youtu.be/benchmark01", "Yeni Favori Şarkı", FAVORITE)
+    print(f"\nartımlı güncelleme (yeniden adlandır + sil + ekle): {(time.perf_counter() - started) * 1000:.3f}ms")
+
+    if worst > args.budget_ms:
+        print(f"\n❌ Bütçe aşıldı: p99 {worst:.2f}ms > {args.budget_ms:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import PlayHistory, history_key
+
+def play_stream(tracks, plays, skew, drift_every, seed):
+    rng = random.Random(seed)
+    ranking = list(range(tracks))
+    rng.shuffle(ranking)
+    weights = [1 / (rank + 1) ** skew for rank in range(tracks)]
+    for index in range(plays):
+        if drift_every and index and index % drift_every == 0:
+            fresh = rng.sample(range(tracks), max(1, tracks // 50))
+            ranking = fresh + [t for t in ranking if t not in set(fresh)]
+        yield ranking[rng.choices(range(tracks), weights)[0]]
+
+
+def url_for(track):
+    return f"https://www.youtube.com/watch?v={track:011d}"
+
+
+class LRUCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.items = OrderedDict()
+
+    def hit(self, key):
+        if key in self.items:
+            self.items.move_to_end(key)
+            return True
+        return False
+
+    def add(self, key, keep=()):
+        while len(self.items) >= self.capacity:
+            victim = next((k for k in self.items if k not in keep), None)
+            if victim is None:
+                return False
+            del self.items[victim]
+        self.items[key] = True
+        return True
+
+
+def threshold_policy(stream, capacity, threshold):
+    cache = LRUCache(capacity)
+    counts = {}
+    served = 0
+    for track in stream:
+        key = history_key(url_for(track))
+        if cache.hit(key):
+            served += 1
+            continue
+        counts[key] = counts.get(key, 0) + 1
+        if counts[key] >= threshold:
+            cache.add(key)
+            counts.pop(key)
+    return served
+
+
+def history_policy(stream, capacity, threshold, top_k, interval, half_life_days, plays_per_day, path):
+    cache = LRUCache(capacity)
+    history = PlayHistory(path, half_life=half_life_days * 24 * 60 * 60, compact_every=10 ** 9)
+    now = 1_700_000_000
+    served = 0
+    record_time = 0.0
+
+    def precache():
+        top = history.top(top_k, min_plays=threshold, now=now)
+        wanted = {history_key(e['url']) for e in top}
+        for entry in top:
+            key = history_key(entry['url'])
+            if key not in cache.items and not cache.add(key, keep=wanted):
+                break
+
+    for index, track in enumerate(stream):
+        now += 24 * 60 * 60 / plays_per_day
+        key = history_key(url_for(track))
+        cached = cache.hit(key)
+        served += cached
+        started = time.perf_counter()
+        entry = history.record(url_for(track), f"Şarkı {track}", 240, cached=cached, now=now)
+        record_time += time.perf_counter() - started
+        if (not cached and entry['plays'] >= threshold) or index % interval == 0:
+            precache()
+    journal = os.path.getsize(history.journal_path)
+    history.compact()
+    return served, history, record_time, journal
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eski eşik+LRU cache politikasını geçmiş tabanlı top-K ön cache ile karşılaştırır")
+    parser.add_argument('--tracks', type=int, default=3000)
+    parser.add_argument('--plays', type=int, default=20000)
+    parser.add_argument('--capacity', type=int, default=150, help="Disk bütçesine sığan şarkı sayısı")
+    parser.add_argument('--top-k', type=int, default=150)
+    parser.add_argument('--threshold', type=int, default=3)
+    parser.add_argument('--skew', type=float, default=1.0, help="Zipf üssü")
+    parser.add_argument('--drift-every', type=int, default=2000, help="Bu kadar çalmada bir popüler şarkıların bir kısmı değişir")
+    parser.add_argument('--interval', type=int, default=25, help="Periyodik ön cache taraması (çalma sayısı)")
+    parser.add_argument('--half-life-days', type=float, default=14)
+    parser.add_argument('--plays-per-day', type=float, default=50)
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    stream = list(play_stream(args.tracks, args.plays, args.skew, args.drift_every, args.seed))
+    old = threshold_policy(stream, args.capacity, args.threshold)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.json')
+        new, history, record_time, journal = history_policy(stream, args.capacity, args.threshold, args.top_k, args.interval, args.half_life_days, args.plays_per_day, path)
+        snapshot = os.path.getsize(path)
+        started = time.perf_counter()
+        reloaded = PlayHistory(path)
+        load_ms = (time.perf_counter() - started) * 1000
+
+    print(f"{args.plays} çalma, {args.tracks} şarkı, {args.capacity} şarkılık bütçe\n")
+    print(f"eski (eşik {args.threshold} + LRU)    cache'den {old / args.plays * 100:5.1f}%   ağdan {args.plays - old}")
+    print(f"geçmiş top-{args.top_k}            cache'den {new / args.plays * 100:5.1f}%   ağdan {args.plays - new}")
+    stats = history.stats()
+    print(f"sayaçlar: cache {stats['served_cache']}, ağ {stats['served_network']}")
+    print(f"\nkayıt maliyeti {record_time / args.plays * 1e6:.1f} µs/çalma, günlük {journal / args.plays:.0f} B/çalma")
+    print(f"özet dosyası {snapshot / 1024:.0f} KB ({len(reloaded.tracks)} şarkı), yükleme {load_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import copy
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tracks import Track
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-us,en;q=0.5',
+    'Sec-Fetch-Mode': 'navigate'
+}
+
+
+def synthetic_info(index):
+    video_id = f"{index:011d}"
+    stream = f"https://rr1---sn-example.googlevideo.com/videoplayback?expire=1999999999&id={video_id}&itag=251&" + "x" * 700
+    formats = [{
+        'format_id': str(itag), 'url': stream.replace('itag=251', f'itag={itag}'), 'ext': 'webm',
+        'acodec': 'opus', 'vcodec': 'none', 'abr': 130.0, 'asr': 48000, 'filesize': 3_500_000 + itag,
+        'protocol': 'https', 'http_headers': dict(HEADERS), 'downloader_options': {'http_chunk_size': 10485760},
+        'format_note': 'medium', 'container': 'webm_dash', 'quality': 3.0, 'has_drm': False
+    } for itag in range(100, 124)]
+    return {
+        'id': video_id, 'title': f"Şarkı {index}", 'duration': 200 + index % 120,
+        'webpage_url': f"https://www.youtube.com/watch?v={video_id}",
+        'url': stream, 'http_headers': dict(HEADERS), 'formats': formats,
+        'thumbnails': [{'url': f"https://i.ytimg.com/vi/{video_id}/{n}.jpg", 'preference': -n, 'id': str(n)} for n in range(40)],
+        'description': "Açıklama " * 200, 'tags': [f"etiket{n}" for n in range(30)],
+        'automatic_captions': {lang: [{'ext': 'json3', 'url': f"https://www.youtube.com/api/timedtext?v={video_id}&lang={lang}"}] for lang in ('en', 'tr', 'de', 'fr', 'es')},
+        'format_id': '251', 'ext': 'webm', 'acodec': 'opus', 'abr': 130.0, 'extractor_key': 'Youtube'
+    }
+
+
+def real_infos(url, count):
+    import yt_dlp
+    with yt_dlp.YoutubeDL({'format': 'bestaudio/best', 'quiet': True, 'noplaylist': True}) as ydl:
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+    return [copy.deepcopy(info) for _ in range(count)]
+
+
+def measure(label, build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    queue = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"{label:<26} {used / 1024 ** 2:9.2f} MB   {used / count:10.0f} B/öğe")
+    return queue, used
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tam yt-dlp sözlükleri ile Track nesnelerinden oluşan bir sıranın bellek kullanımını karşılaştırır")
+    parser.add_argument('--entries', type=int, default=5000)
+    parser.add_argument('--url', help="Sentetik veri yerine bu videonun gerçek extract_info çıktısını kopyala")
+    args = parser.parse_args()
+
+    def infos():
+        return real_infos(args.url, args.entries) if args.url else [synthetic_info(i) for i in range(args.entries)]
+
+    full, full_bytes = measure("tam bilgi sözlükleri", infos, args.entries)
+    del full
+    slim, slim_bytes = measure("Track (__slots__)", lambda: [Track.from_info(info) for info in infos()], args.entries)
+    print(f"\n{args.entries} öğelik sıra: {full_bytes / max(slim_bytes, 1):.0f}x daha az bellek, {(full_bytes - slim_bytes) / 1024 ** 2:.1f} MB tasarruf")
+    assert len(slim) == args.entries
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('yt_dlp', 'edge_tts', 'customtkinter', 'tkinter', 'pynput', 'aiohttp', 'discord')
+IMPORT_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+CONSTRUCT = """
+import time, json
+started = time.perf_counter()
+import music_bot
+imported = time.perf_counter()
+bot = music_bot.MusicBot()
+built = time.perf_counter()
+print(json.dumps({'import_ms': (imported - started) * 1000, 'construct_ms': (built - imported) * 1000}))
+"""
+
+READY = """
+import time, json, asyncio
+started = time.perf_counter()
+import music_bot
+
+class Probe(music_bot.MusicBot):
+    async def on_ready(self):
+        await super().on_ready()
+        print(json.dumps({'ready_ms': (time.perf_counter() - started) * 1000, 'phases': self.startup}), flush=True)
+        await self.close()
+
+Probe().run(music_bot.TOKEN, log_handler=None)
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault('DISCORD_TOKEN', 'benchmark')
+    env['PYTHONPATH'] = ROOT + os.pathsep + env.get('PYTHONPATH', '')
+    return env
+
+
+def import_profile(module, workdir):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=workdir, env=child_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr.strip().splitlines()[-1] if result.stderr else f"{module} içe aktarılamadı")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)) / 1000, int(match.group(2)) / 1000, len(match.group(3))))
+    return rows
+
+
+def run_json(code, runs, workdir):
+    results = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], cwd=workdir, env=child_env(), capture_output=True, text=True)
+        lines = [line for line in result.stdout.splitlines() if line.startswith('{')]
+        if result.returncode != 0 or not lines:
+            raise SystemExit(result.stderr.strip() or "Ölçüm betiği sonuç üretmedi")
+        results.append(json.loads(lines[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Açılış süresini ve hangi ağır modüllerin açılışta yüklendiğini ölçer")
+    parser.add_argument('--module', default='music_bot', choices=['music_bot', 'daemon', 'main'])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--ready', action='store_true', help="Gerçek DISCORD_TOKEN ile on_ready'e kadar geçen süreyi ölç")
+    parser.add_argument('--budget-ms', type=float, help="Medyan kurulum süresi bu değeri aşarsa hata koduyla çık")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='senfoni-startup-') as workdir:
+        run(args, workdir)
+
+
+def run(args, workdir):
+    rows = import_profile(args.module, workdir)
+    total = sum(cumulative for _, _, cumulative, depth in rows if depth == 1)
+    print(f"{args.module} içe aktarma: {total:.1f}ms ({len(rows)} modül)\n")
+    for name, _, cumulative, _ in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"  {cumulative:8.1f}ms  {name}")
+    loaded = {name.split('.')[0] for name, *_ in rows}
+    print("\nAğır modüller:")
+    for name in HEAVY:
+        print(f"  {name:<14} {'açılışta yükleniyor' if name in loaded else 'ertelendi'}")
+
+    measured = statistics.median(r['import_ms'] + r['construct_ms'] for r in run_json(CONSTRUCT, args.runs, workdir))
+    print(f"\nimport + MusicBot() medyanı ({args.runs} çalıştırma): {measured:.1f}ms")
+
+    if args.ready:
+        if os.getenv('DISCORD_TOKEN') in (None, '', 'benchmark'):
+            raise SystemExit("--ready için geçerli bir DISCORD_TOKEN gerekli")
+        result = run_json(READY, 1, workdir)[0]
+        phases = ', '.join(f"{k} {v * 1000:.0f}ms" for k, v in result['phases'].items())
+        print(f"on_ready'e kadar: {result['ready_ms']:.1f}ms ({phases})")
+
+    if args.budget_ms is not None and measured > args.budget_ms:
+        print(f"\n❌ Bütçe aşıldı: {measured:.1f}ms > {args.budget_ms:.0f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
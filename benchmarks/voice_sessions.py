@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import random
+import argparse
+from array import array
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord
+from audio import FRAME_MS, FRAME_SAMPLES, MixerSource, summarize
+
+DELAY = FRAME_MS / 1000
+
+
+class FrameSource(discord.AudioSource):
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+
+    def read(self):
+        data = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return data
+
+    def is_opus(self):
+        return False
+
+
+def open_source(args, frames):
+    if args.file:
+        return discord.FFmpegPCMAudio(args.file, executable=args.ffmpeg)
+    return FrameSource(frames)
+
+
+def player_loop(mixer, encoder, seconds, lateness, stop):
+    loops = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while not stop.is_set() and time.perf_counter() < deadline:
+        loops += 1
+        data = mixer.read()
+        if encoder is not None and not mixer.is_opus():
+            encoder.encode(data, encoder.SAMPLES_PER_FRAME)
+        scheduled = start + DELAY * (loops - 1)
+        lateness.append((time.perf_counter() - scheduled) * 1000)
+        next_time = start + DELAY * loops
+        time.sleep(max(0, DELAY + (next_time - time.perf_counter())))
+
+
+def run_step(count, args, frames):
+    stop = threading.Event()
+    results = []
+    threads = []
+    mixers = []
+    for _ in range(count):
+        mixer = MixerSource(volume=args.volume, loudness_target=args.loudness_target)
+        mixer.play(open_source(args, frames))
+        encoder = discord.opus.Encoder() if args.encode else None
+        lateness = []
+        results.append(lateness)
+        mixers.append(mixer)
+        threads.append(threading.Thread(target=player_loop, args=(mixer, encoder, args.seconds, lateness, stop), daemon=True))
+    started_cpu = time.process_time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    cpu = time.process_time() - started_cpu
+    for mixer in mixers:
+        mixer.stop()
+    samples = [value for lateness in results for value in lateness]
+    slipped = sum(1 for value in samples if value > FRAME_MS)
+    summary = summarize(samples) or {'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0, 'max_ms': 0}
+    print(f"{count:>4} oturum  gecikme p50 {summary['p50_ms']:6.2f}ms  p99 {summary['p99_ms']:7.2f}ms  "
+          f"max {summary['max_ms']:7.1f}ms  kaçan kare %{(slipped / len(samples) * 100) if samples else 0:5.2f}  "
+          f"cpu %{cpu / args.seconds * 100:6.1f}")
+    return summary['p99_ms']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tek süreçte kaç eşzamanlı ses oturumunun 20 ms kare süresini tutturabildiğini ölçer")
+    parser.add_argument('--file', help="Sentetik kareler yerine ffmpeg ile çözülecek ses dosyası")
+    parser.add_argument('--ffmpeg', default=os.getenv('FFMPEG_PATH', 'ffmpeg'))
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--max-sessions', type=int, default=256)
+    parser.add_argument('--volume', type=float, default=0.8)
+    parser.add_argument('--loudness-target', type=float, default=-14.0)
+    parser.add_argument('--no-encode', dest='encode', action='store_false', help="Opus kodlamasını atla")
+    parser.add_argument('--slip-ms', type=float, default=FRAME_MS, help="p99 gecikme eşiği")
+    args = parser.parse_args()
+    if args.encode and not discord.opus.is_loaded():
+        discord.opus._load_default()
+    rng = random.Random(7)
+    frames = [array('h', (rng.randint(-12000, 12000) for _ in range(FRAME_SAMPLES))).tobytes() for _ in range(50)]
+    sustained = 0
+    count = 1
+    while count <= args.max_sessions:
+        if run_step(count, args, frames) > args.slip_ms:
+            break
+        sustained = count
+        count *= 2
+    print(f"\nKare süresi kaymadan sürdürülen en fazla oturum: {sustained}")
+
+
+if __name__ == "__main__":
+    main()
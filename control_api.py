@@ -0,0 +1,310 @@
+import json
+import hmac
+import math
+import asyncio
+import logging
+
+from aiohttp import web, WSMsgType
+
+from tracks import Track
+
+logger = logging.getLogger('MusicBot')
+
+DEFAULT_PORT = 8765
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost', '::1')
+LOCAL_NAMES = ('127.0.0.1', 'localhost', '[::1]')
+BODY_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+STREAM_INTERVAL = 0.2
+PROGRESS_INTERVAL = 1.0
+
+
+def session_state(session):
+    return {
+        'guild': session.guild_id,
+        'state': session.playback.state,
+        'title': session.current_title,
+        'url': session.current_url,
+        'duration': session.duration,
+        'position': session.get_elapsed_time(),
+        'volume': session.volume,
+        'loop': session.loop_mode,
+        'cached': session.is_playing_from_cache,
+        'queue': [track.to_dict() for track in session.queue],
+        'version': session.feed.version
+    }
+
+
+class ControlServer:
+    def __init__(self, bot, host='127.0.0.1', port=DEFAULT_PORT, token=''):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.token = token or ''
+        self._runner = None
+        self.app = web.Application(middlewares=[self._guard, self._auth])
+        self.app.add_routes([
+            web.get('/state', self.get_state),
+            web.get('/stats', self.get_stats),
+            web.get('/ws', self.stream),
+            web.get('/search', self.search),
+            web.post('/join', self.join),
+            web.post('/play', self.play),
+            web.post('/queue', self.enqueue),
+            web.post('/skip', self.skip),
+            web.post('/pause', self.pause),
+            web.post('/resume', self.resume),
+            web.post('/stop', self.stop_playback),
+            web.post('/seek', self.seek),
+            web.post('/volume', self.volume),
+            web.post('/loop', self.loop_mode),
+            web.post('/tts', self.speak),
+            web.get('/favorites', self.get_favorites),
+            web.post('/favorites', self.add_favorite),
+            web.delete('/favorites', self.remove_favorite),
+            web.post('/favorites/rename', self.rename_favorite),
+            web.post('/favorites/play', self.play_favorite),
+        ])
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"🛰 Kontrol API'si dinleniyor: http://{self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _guard(self, request, handler):
+        if self.host in LOOPBACK_HOSTS and request.host not in {f"{host}:{self.port}" for host in LOCAL_NAMES}:
+            raise web.HTTPForbidden(text=json.dumps({'error': 'Geçersiz Host'}), content_type='application/json')
+        origin = request.headers.get('Origin')
+        if origin is not None and origin not in (f"http://{request.host}", f"https://{request.host}"):
+            raise web.HTTPForbidden(text=json.dumps({'error': 'Yabancı Origin'}), content_type='application/json')
+        if request.method in BODY_METHODS and request.content_type != 'application/json':
+            raise web.HTTPUnsupportedMediaType(text=json.dumps({'error': 'Content-Type: application/json gerekli'}), content_type='application/json')
+        return await handler(request)
+
+    @web.middleware
+    async def _auth(self, request, handler):
+        if self.token:
+            supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip() or request.query.get('token', '')
+            if not hmac.compare_digest(supplied, self.token):
+                raise web.HTTPUnauthorized(text=json.dumps({'error': 'Yetkisiz'}), content_type='application/json')
+        return await handler(request)
+
+    def _guild(self, request):
+        guild = request.query.get('guild')
+        if not guild:
+            return None
+        try:
+            return int(guild)
+        except ValueError:
+            raise web.HTTPBadRequest(text=json.dumps({'error': 'Geçersiz guild'}), content_type='application/json')
+
+    def _session(self, request, create=False):
+        guild = self._guild(request)
+        if guild is None:
+            session = self.bot.owner_session()
+        elif create and self.bot.get_guild(guild) is not None:
+            session = self.bot.get_session(guild)
+        else:
+            session = self.bot.sessions.get(guild)
+        if session is None:
+            raise web.HTTPConflict(text=json.dumps({'error': 'Aktif oturum yok'}), content_type='application/json')
+        return session
+
+    def _number(self, data, key, kind=float):
+        try:
+            value = kind(data[key])
+        except (TypeError, ValueError, OverflowError):
+            raise web.HTTPBadRequest(text=json.dumps({'error': f"Geçersiz sayı: {key}"}), content_type='application/json')
+        if isinstance(value, float) and not math.isfinite(value):
+            raise web.HTTPBadRequest(text=json.dumps({'error': f"Geçersiz sayı: {key}"}), content_type='application/json')
+        return value
+
+    async def _body(self, request, *required):
+        try:
+            data = await request.json() if request.can_read_body else {}
+        except json.JSONDecodeError:
+            data = None
+        if not isinstance(data, dict) or any(data.get(k) in (None, '') for k in required):
+            raise web.HTTPBadRequest(text=json.dumps({'error': f"Gerekli alanlar: {', '.join(required)}"}), content_type='application/json')
+        return data
+
+    def _result(self, ok, **extra):
+        return web.json_response({'ok': bool(ok), **extra}, status=200 if ok else 422)
+
+    async def get_state(self, request):
+        return web.json_response(session_state(self._session(request)))
+
+    async def get_stats(self, request):
+        session = self._session(request)
+        return web.json_response({
+            'latency': session.playback.stats(),
+            'telemetry': session.playback.telemetry(),
+            'cache': self.bot.song_cache.stats(),
+            'streams': self.bot.stream_stats,
+            'extraction': self.bot.extractor.stats(),
+            'tts': self.bot.tts.stats(),
+            'search': {**self.bot.search.stats(), **self.bot.search_stats},
+            'history': {**self.bot.history.stats(), **self.bot.precache_stats},
+            'sessions': len(self.bot.sessions)
+        })
+
+    async def search(self, request):
+        query = request.query.get('q', '')
+        try:
+            limit = max(1, min(int(request.query.get('limit', 8)), 50))
+        except ValueError:
+            raise web.HTTPBadRequest(text=json.dumps({'error': 'Geçersiz limit'}), content_type='application/json')
+        results = self.bot.search.search(query, limit=limit)
+        best = self.bot.search.best(query)
+        return web.json_response({
+            'results': [entry.to_dict(score) for entry, score, _ in results],
+            'best': best.to_dict() if best else None
+        })
+
+    async def join(self, request):
+        session = self._session(request, create=True)
+        channel = await session.join_user_channel(self.bot.owner_id) if self.bot.owner_id else None
+        return self._result(channel, channel=channel)
+
+    async def play(self, request):
+        data = await self._body(request, 'query')
+        title = await self._session(request).play_music(data['query'], network=bool(data.get('network')))
+        return self._result(title, title=title)
+
+    async def enqueue(self, request):
+        data = await self._body(request, 'query')
+        result = await self._session(request).add_to_queue(data['query'], network=bool(data.get('network')))
+        return self._result(result, message=result)
+
+    async def skip(self, request):
+        await self._session(request).skip_track()
+        return self._result(True)
+
+    async def pause(self, request):
+        return self._result(self._session(request).playback.pause())
+
+    async def resume(self, request):
+        return self._result(self._session(request).playback.resume())
+
+    async def stop_playback(self, request):
+        await self._session(request).stop_music()
+        return self._result(True)
+
+    async def seek(self, request):
+        data = await self._body(request, 'seconds')
+        session = self._session(request)
+        if not session.current_url and not session.current_track:
+            return self._result(False, error='Çalan şarkı yok')
+        title = await session.seek(max(0, self._number(data, 'seconds', int)))
+        return self._result(title, title=title)
+
+    async def volume(self, request):
+        data = await self._body(request, 'value')
+        value = min(2.0, max(0.0, self._number(data, 'value')))
+        await self._session(request).set_volume(value)
+        return self._result(True, volume=value)
+
+    async def loop_mode(self, request):
+        data = await self._body(request, 'enabled')
+        session = self._session(request)
+        session.loop_mode = bool(data['enabled'])
+        return self._result(True, loop=session.loop_mode)
+
+    async def speak(self, request):
+        data = await self._body(request, 'text')
+        success = await self._session(request).speak_text(data['text'], data.get('language', 'auto'), data.get('gender', 'female'), bool(data.get('pin')))
+        return self._result(success)
+
+    async def get_favorites(self, request):
+        return web.json_response(list(self.bot.favorites))
+
+    async def add_favorite(self, request):
+        data = await self._body(request)
+        if data.get('url'):
+            url, title, duration = data['url'], data.get('title') or data['url'], data.get('duration', 0)
+        else:
+            session = self._session(request)
+            url, title, duration = session.current_url, session.current_title, session.duration
+        return self._result(self.bot.add_to_favorites(url, title, duration), url=url)
+
+    async def remove_favorite(self, request):
+        url = request.query.get('url') or (await self._body(request, 'url'))['url']
+        found = self.bot.is_favorite(url)
+        if found:
+            self.bot.remove_from_favorites(url)
+        return self._result(found)
+
+    async def rename_favorite(self, request):
+        data = await self._body(request, 'url', 'title')
+        return self._result(self.bot.rename_favorite(data['url'], data['title'].strip()))
+
+    async def play_favorite(self, request):
+        data = await self._body(request, 'url')
+        fav = self.bot.favorites.get(data['url'])
+        if fav is None:
+            return self._result(False, error='Favori bulunamadı')
+        session = self._session(request)
+        if self.bot.is_cached(fav['url']):
+            title = await session.play_from_cache(fav['url'], fav.get('title', 'Bilinmiyor'), fav.get('duration', 0))
+        else:
+            title = await session.play_music(fav['url'])
+        return self._result(title, title=title)
+
+    async def stream(self, request):
+        guild = self._guild(request)
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        session = None
+        versions = {'session': -1, 'bot': -1}
+        last_progress = None
+        last_progress_at = 0.0
+        loop = asyncio.get_running_loop()
+        reader = asyncio.create_task(self._drain(ws))
+        try:
+            while not ws.closed and not reader.done():
+                current = self.bot.sessions.get(guild) if guild is not None else self.bot.owner_session(create=False)
+                if current is not session:
+                    session = current
+                    versions['session'] = -1
+                if session is not None:
+                    await self._forward(ws, 'session', session.feed, versions, lambda: session_state(session))
+                await self._forward(ws, 'bot', self.bot.feed, versions, lambda: {'favorites': list(self.bot.favorites)})
+                now = loop.time()
+                if session is not None and now - last_progress_at >= PROGRESS_INTERVAL:
+                    progress = (session.playback.state, session.get_elapsed_time())
+                    if progress != last_progress:
+                        last_progress = progress
+                        await ws.send_json({'type': 'progress', 'guild': session.guild_id, 'state': progress[0], 'position': progress[1]})
+                    last_progress_at = now
+                await asyncio.sleep(STREAM_INTERVAL)
+        except (ConnectionResetError, RuntimeError):
+            pass
+        finally:
+            reader.cancel()
+            await ws.close()
+        return ws
+
+    async def _forward(self, ws, name, feed, versions, snapshot):
+        events, complete = feed.since(versions[name])
+        if not complete:
+            versions[name], state = feed.snapshot(snapshot)
+            await ws.send_json({'type': 'snapshot', 'source': name, 'version': versions[name], 'state': state})
+            return
+        for version, topic, op, index, value in events:
+            versions[name] = version
+            if isinstance(value, Track):
+                value = value.to_dict()
+            elif topic == 'queue' and isinstance(value, list):
+                value = [track.to_dict() for track in value]
+            await ws.send_json({'type': 'event', 'source': name, 'version': version, 'topic': topic, 'op': op, 'index': index, 'value': value})
+
+    async def _drain(self, ws):
+        async for message in ws:
+            if message.type == WSMsgType.ERROR:
+                break
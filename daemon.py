@@ -0,0 +1,18 @@
+import secrets
+
+from music_bot import MusicBot, CONFIG, TOKEN, logger
+from control_api import DEFAULT_PORT
+
+
+def main():
+    port = CONFIG.get('CONTROL_PORT') or DEFAULT_PORT
+    logger.info("🖥 Arayüzsüz (daemon) modda başlatılıyor")
+    if not CONFIG.get('CONTROL_TOKEN'):
+        CONFIG['CONTROL_TOKEN'] = secrets.token_urlsafe(24)
+        logger.warning(f"🔑 CONTROL_TOKEN tanımlı değil, bu çalıştırma için üretildi: {CONFIG['CONTROL_TOKEN']}")
+    bot = MusicBot(control_port=port)
+    bot.run(TOKEN)
+
+
+if __name__ == "__main__":
+    main()
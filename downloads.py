@@ -0,0 +1,149 @@
+import asyncio
+import itertools
+import logging
+import time
+
+logger = logging.getLogger('MusicBot')
+
+PRIORITY_USER = 0
+PRIORITY_NEXT = 1
+PRIORITY_WARMUP = 2
+
+
+class DownloadJob:
+    def __init__(self, key, url, title, priority):
+        self.key = key
+        self.url = url
+        self.title = title
+        self.priority = priority
+        self.attempts = 0
+        self.running = False
+        self.future = None
+
+
+class DownloadScheduler:
+    def __init__(self, download_func, workers=2, max_retries=3, backoff_base=2.0):
+        self.download_func = download_func
+        self.worker_count = max(1, workers)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._queue = None
+        self._workers = []
+        self._retry_tasks = set()
+        self._seq = itertools.count()
+        self.jobs = {}
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.submitted = 0
+        self.started_at = None
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+        if not self._workers:
+            self.started_at = time.perf_counter()
+            for i in range(self.worker_count):
+                self._workers.append(asyncio.create_task(self._worker(i)))
+
+    def submit(self, key, url, title, priority=PRIORITY_WARMUP):
+        self._ensure_workers()
+        job = self.jobs.get(key)
+        if job is not None:
+            if priority < job.priority and not job.running:
+                job.priority = priority
+                self._queue.put_nowait((priority, next(self._seq), job))
+                logger.info(f"⬆ İndirme öne alındı: {title}")
+            return job.future
+        job = DownloadJob(key, url, title, priority)
+        job.future = asyncio.get_running_loop().create_future()
+        self.jobs[key] = job
+        self.submitted += 1
+        self._queue.put_nowait((priority, next(self._seq), job))
+        return job.future
+
+    async def _worker(self, index):
+        while True:
+            priority, _, job = await self._queue.get()
+            try:
+                if priority != job.priority or job.running or job.future.done() or self.jobs.get(job.key) is not job:
+                    continue
+                job.running = True
+                self.active += 1
+                try:
+                    job.attempts += 1
+                    result = await self.download_func(job.url, job.title)
+                    error = None if result else RuntimeError("indirme sonuç döndürmedi")
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    result, error = None, e
+                finally:
+                    job.running = False
+                    self.active -= 1
+                if error is None:
+                    self._finish(job, result)
+                elif job.attempts <= self.max_retries:
+                    self._retry(job, error)
+                else:
+                    self.failed += 1
+                    logger.error(f"İndirme başarısız ({job.attempts} deneme): {job.title} - {error}")
+                    self._finish(job, None)
+            finally:
+                self._queue.task_done()
+
+    def _retry(self, job, error):
+        delay = self.backoff_base * (2 ** (job.attempts - 1))
+        self.retried += 1
+        logger.warning(f"İndirme tekrar denenecek ({delay:.0f}s): {job.title} - {error}")
+
+        async def requeue():
+            await asyncio.sleep(delay)
+            self._queue.put_nowait((job.priority, next(self._seq), job))
+
+        task = asyncio.create_task(requeue())
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    def _finish(self, job, result):
+        self.jobs.pop(job.key, None)
+        if result:
+            self.completed += 1
+        if not job.future.done():
+            job.future.set_result(result)
+        self.log_progress()
+
+    def progress(self):
+        elapsed = (time.perf_counter() - self.started_at) if self.started_at else 0.0
+        return {
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'retried': self.retried,
+            'pending': len(self.jobs),
+            'active': self.active,
+            'elapsed': elapsed
+        }
+
+    def log_progress(self):
+        p = self.progress()
+        done = p['completed'] + p['failed']
+        logger.info(
+            f"📥 Cache indirme: {done}/{p['submitted']} "
+            f"({p['active']} aktif, {p['pending']} bekliyor, {p['failed']} hata, {p['elapsed']:.0f}s)"
+        )
+
+    async def join(self):
+        pending = [job.future for job in self.jobs.values()]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def shutdown(self):
+        for task in list(self._workers) + list(self._retry_tasks):
+            task.cancel()
+        self._workers = []
+        for job in self.jobs.values():
+            if job.future and not job.future.done():
+                job.future.cancel()
+        self.jobs.clear()
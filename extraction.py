@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from resolve_cache import normalize_query
+from tracks import Track
+
+logger = logging.getLogger('MusicBot')
+
+PLAYLIST_OPTIONS = {'extract_flat': 'in_playlist', 'noplaylist': False, 'lazy_playlist': True}
+_END = object()
+
+
+def playlist_entry(entry):
+    page_url = entry.get('webpage_url') or entry.get('url') or ''
+    if not page_url.startswith(("http://", "https://")) and entry.get('id'):
+        if entry.get('ie_key', 'Youtube') != 'Youtube':
+            return None
+        page_url = f"https://www.youtube.com/watch?v={entry['id']}"
+    if not page_url:
+        return None
+    return Track(page_url, entry.get('title'), entry.get('duration'), entry.get('id'))
+
+
+class ExtractionService:
+    def __init__(self, ydl_options, lookup_workers=3, download_workers=2, scan_workers=1):
+        self.ydl_options = ydl_options
+        self.lookup_workers = max(2, lookup_workers)
+        self.download_workers = max(1, download_workers)
+        self.scan_workers = max(1, scan_workers)
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.lookup_workers + self.download_workers + self.scan_workers,
+            thread_name_prefix='ytdl'
+        )
+        self._pool = queue.Queue()
+        self._created = 0
+        self._create_lock = threading.Lock()
+        self._urgent_slots = None
+        self._lookup_slots = None
+        self._download_slots = None
+        self._scan_slots = None
+        self._inflight = {}
+        self._escalations = {}
+        self.deduplicated = 0
+        self.escalated = 0
+        self.lookups = 0
+        self.downloads = 0
+        self.playlist_entries = 0
+
+    def _semaphores(self):
+        if self._lookup_slots is None:
+            self._urgent_slots = asyncio.Semaphore(1)
+            self._lookup_slots = asyncio.Semaphore(self.lookup_workers - 1)
+            self._download_slots = asyncio.Semaphore(self.download_workers)
+            self._scan_slots = asyncio.Semaphore(self.scan_workers)
+        return self._urgent_slots, self._lookup_slots, self._download_slots, self._scan_slots
+
+    def _new_ydl(self, options):
+        import yt_dlp
+        return yt_dlp.YoutubeDL(options)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._create_lock:
+            if self._created < self.lookup_workers:
+                self._created += 1
+                return self._new_ydl(dict(self.ydl_options))
+        return self._pool.get()
+
+    def preload(self):
+        self._pool.put(self._acquire())
+
+    def _extract_blocking(self, search_str):
+        ydl = self._acquire()
+        try:
+            return ydl.extract_info(search_str, download=False)
+        finally:
+            self._pool.put(ydl)
+
+    def _scan_playlist_blocking(self, url, limit, emit, cancelled):
+        with self._new_ydl({**self.ydl_options, **PLAYLIST_OPTIONS}) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+            if info and info.get('_type') in ('url', 'url_transparent'):
+                info = ydl.extract_info(info['url'], download=False, process=False)
+            count = 0
+            for entry in (info or {}).get('entries') or []:
+                if cancelled.is_set() or count >= limit:
+                    break
+                item = playlist_entry(entry) if entry else None
+                if item:
+                    count += 1
+                    emit(item)
+            return count
+
+    def _download_blocking(self, url, options):
+        with self._new_ydl(options) as ydl:
+            return ydl.extract_info(url, download=True)
+
+    async def _shared(self, key, factory):
+        task = self._inflight.get(key)
+        if task is not None:
+            self.deduplicated += 1
+            logger.info(f"🔗 Aynı istek zaten sürüyor, sonuç paylaşılıyor: {key}")
+            return await asyncio.shield(task)
+        task = asyncio.ensure_future(factory())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _abandon(self, waiter, slots):
+        waiter.cancel()
+        waiter.add_done_callback(lambda w: w.cancelled() or slots.release())
+
+    async def _lookup_slot(self, escalate):
+        urgent_slots, lookup_slots, _, _ = self._semaphores()
+        if not escalate.is_set():
+            waiter = asyncio.ensure_future(lookup_slots.acquire())
+            escalated = asyncio.ensure_future(escalate.wait())
+            try:
+                await asyncio.wait((waiter, escalated), return_when=asyncio.FIRST_COMPLETED)
+            except BaseException:
+                self._abandon(waiter, lookup_slots)
+                raise
+            finally:
+                escalated.cancel()
+            if waiter.done():
+                return lookup_slots
+            self._abandon(waiter, lookup_slots)
+        await urgent_slots.acquire()
+        return urgent_slots
+
+    async def extract(self, search_str, urgent=False):
+        key = 'lookup:' + normalize_query(search_str)
+        escalate = self._escalations.get(key)
+        if key not in self._inflight:
+            escalate = self._escalations[key] = asyncio.Event()
+            if urgent:
+                escalate.set()
+        elif urgent and escalate is not None and not escalate.is_set():
+            self.escalated += 1
+            logger.info(f"⏫ Bekleyen arama acil kuyruğa alındı: {key}")
+            escalate.set()
+
+        async def run():
+            try:
+                slots = await self._lookup_slot(escalate)
+            finally:
+                if self._escalations.get(key) is escalate:
+                    del self._escalations[key]
+            try:
+                self.lookups += 1
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, self._extract_blocking, search_str)
+            finally:
+                slots.release()
+
+        return await self._shared(key, run)
+
+    async def download(self, url, options, key=None):
+        _, _, download_slots, _ = self._semaphores()
+        key = 'download:' + (key or normalize_query(url))
+
+        async def run():
+            async with download_slots:
+                self.downloads += 1
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.executor, self._download_blocking, url, options)
+
+        return await self._shared(key, run)
+
+    async def playlist(self, url, limit=1000):
+        loop = asyncio.get_running_loop()
+        channel = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def emit(item):
+            loop.call_soon_threadsafe(channel.put_nowait, item)
+
+        def finished(future):
+            scan_slots.release()
+            error = None if future.cancelled() else future.exception()
+            channel.put_nowait(error or _END)
+
+        *_, scan_slots = self._semaphores()
+        await scan_slots.acquire()
+        scan = loop.run_in_executor(self.executor, self._scan_playlist_blocking, url, limit, emit, cancelled)
+        scan.add_done_callback(finished)
+        try:
+            while True:
+                item = await channel.get()
+                if item is _END:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                self.playlist_entries += 1
+                yield item
+        finally:
+            cancelled.set()
+
+    def stats(self):
+        return {
+            'lookups': self.lookups,
+            'downloads': self.downloads,
+            'playlist_entries': self.playlist_entries,
+            'deduplicated': self.deduplicated,
+            'escalated': self.escalated,
+            'inflight': len(self._inflight)
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        while not self._pool.empty():
+            try:
+                self._pool.get_nowait().close()
+            except Exception:
+                pass
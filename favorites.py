@@ -0,0 +1,144 @@
+import json
+import logging
+import threading
+
+from resolve_cache import normalize_query
+from state_feed import INSERT, REMOVE, UPDATE
+from storage import JOURNAL_SUFFIX, Journal, write_json
+
+logger = logging.getLogger('MusicBot')
+
+COMPACT_EVERY = 500
+
+
+def favorite_key(url):
+    return normalize_query(url)
+
+
+class FavoritesStore:
+    def __init__(self, path='favorites.json', feed=None, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.journal = Journal(self.journal_path, 'Favori', durable=True)
+        self.feed = feed
+        self.compact_every = compact_every
+        self._lock = feed.lock if feed is not None else threading.RLock()
+        self._items = []
+        self._by_key = {}
+        self.load()
+
+    def load(self):
+        with self._lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except FileNotFoundError:
+                snapshot = []
+            except Exception as e:
+                logger.error(f"Favori dosyası okunamadı: {e}")
+                snapshot = []
+            for fav in snapshot:
+                if fav.get('url') and favorite_key(fav['url']) not in self._by_key:
+                    self._insert(fav)
+            replayed = 0
+            for entry in self.journal.replay():
+                self._apply(entry)
+                replayed += 1
+        if replayed:
+            logger.info(f"⭐ Favori günlüğünden {replayed} işlem yeniden uygulandı")
+        if replayed or self.journal.exists():
+            self.compact()
+
+    def _apply(self, entry):
+        op, url = entry.get('op'), entry.get('url')
+        if op == 'add' and url and favorite_key(url) not in self._by_key:
+            self._insert({'title': entry.get('title') or url, 'url': url, 'duration': entry.get('duration', 0)})
+        elif op == 'remove':
+            self._delete(favorite_key(url))
+        elif op == 'rename':
+            fav = self._by_key.get(favorite_key(url))
+            if fav:
+                fav['title'] = entry.get('title') or fav['title']
+
+    def _insert(self, fav):
+        self._items.append(fav)
+        self._by_key[favorite_key(fav['url'])] = fav
+        return len(self._items) - 1
+
+    def _delete(self, key):
+        fav = self._by_key.pop(key, None)
+        if fav is None:
+            return None
+        index = self._items.index(fav)
+        del self._items[index]
+        return index
+
+    def _append(self, entry):
+        self.journal.append(entry)
+        if self.journal.pending >= self.compact_every:
+            self.compact()
+
+    def _publish(self, op, index=None, value=None):
+        if self.feed is not None:
+            self.feed.publish('favorites', op, index, value)
+
+    def compact(self):
+        with self._lock:
+            try:
+                write_json(self.path, self._items, durable=True, indent=2)
+            except Exception as e:
+                logger.error(f"Favori kaydetme hatası: {e}")
+                return False
+            self.journal.clear()
+            return True
+
+    def close(self):
+        with self._lock:
+            if self.journal.pending:
+                self.compact()
+            else:
+                self.journal.close()
+
+    def add(self, url, title, duration=0):
+        if not url or not title:
+            return None
+        with self._lock:
+            if favorite_key(url) in self._by_key:
+                return None
+            fav = {'title': title, 'url': url, 'duration': duration}
+            index = self._insert(fav)
+            self._publish(INSERT, index, fav)
+            self._append({'op': 'add', 'url': url, 'title': title, 'duration': duration})
+            return fav
+
+    def remove(self, url):
+        with self._lock:
+            index = self._delete(favorite_key(url))
+            if index is None:
+                return False
+            self._publish(REMOVE, index)
+            self._append({'op': 'remove', 'url': url})
+            return True
+
+    def rename(self, url, title):
+        with self._lock:
+            fav = self._by_key.get(favorite_key(url))
+            if fav is None:
+                return False
+            fav['title'] = title
+            self._publish(UPDATE, self._items.index(fav), fav)
+            self._append({'op': 'rename', 'url': url, 'title': title})
+            return True
+
+    def get(self, url):
+        return self._by_key.get(favorite_key(url)) if url else None
+
+    def __contains__(self, url):
+        return bool(url) and favorite_key(url) in self._by_key
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._items))
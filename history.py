@@ -0,0 +1,126 @@
+import json
+import time
+import heapq
+import logging
+import threading
+
+from resolve_cache import normalize_query
+from storage import JOURNAL_SUFFIX, Journal, write_json
+
+logger = logging.getLogger('MusicBot')
+
+COMPACT_EVERY = 200
+HALF_LIFE = 14 * 24 * 60 * 60
+SERVED = {'c': 'cache', 'n': 'network'}
+
+
+def history_key(url):
+    return normalize_query(url)
+
+
+class PlayHistory:
+    def __init__(self, path='history.json', half_life=HALF_LIFE, compact_every=COMPACT_EVERY):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.journal = Journal(self.journal_path, 'Çalma geçmişi')
+        self.half_life = half_life
+        self.compact_every = compact_every
+        self.tracks = {}
+        self.served = {'cache': 0, 'network': 0}
+        self.session_served = {'cache': 0, 'network': 0}
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        with self._lock:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+                self.tracks = raw.get('tracks', {})
+                self.served.update(raw.get('served', {}))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"Çalma geçmişi okunamadı: {e}")
+            replayed = 0
+            for played_at, url, title, duration, served in self.journal.replay():
+                self._apply(played_at, url, title, duration, SERVED.get(served, 'network'))
+                replayed += 1
+        if replayed or self.journal.exists():
+            self.compact()
+
+    def decayed(self, entry, now=None):
+        age = max(0.0, (now or time.time()) - entry.get('last', 0))
+        return entry.get('score', 0.0) * 0.5 ** (age / self.half_life)
+
+    def _apply(self, played_at, url, title, duration, served):
+        key = history_key(url)
+        entry = self.tracks.get(key)
+        if entry is None:
+            entry = self.tracks[key] = {'url': url, 'title': title, 'duration': duration, 'plays': 0, 'last': played_at, 'score': 0.0}
+        entry['score'] = self.decayed(entry, played_at) + 1
+        entry['plays'] += 1
+        entry['last'] = played_at
+        if title:
+            entry['title'] = title
+        if duration:
+            entry['duration'] = duration
+        self.served[served] += 1
+        return entry
+
+    def record(self, url, title=None, duration=0, cached=False, now=None):
+        if not url:
+            return None
+        served = 'cache' if cached else 'network'
+        now = now or time.time()
+        with self._lock:
+            entry = self._apply(now, url, title, int(duration or 0), served)
+            self.session_served[served] += 1
+            self.journal.append([round(now), url, title, int(duration or 0), served[0]])
+            if self.journal.pending >= self.compact_every:
+                self.compact()
+            return dict(entry)
+
+    def compact(self):
+        with self._lock:
+            try:
+                write_json(self.path, {'tracks': self.tracks, 'served': self.served})
+            except Exception as e:
+                logger.error(f"Çalma geçmişi kaydedilemedi: {e}")
+                return False
+            self.journal.clear()
+            return True
+
+    def close(self):
+        with self._lock:
+            if self.journal.pending:
+                self.compact()
+            else:
+                self.journal.close()
+
+    def get(self, url):
+        return self.tracks.get(history_key(url)) if url else None
+
+    def top(self, k, min_plays=1, now=None):
+        now = now or time.time()
+        with self._lock:
+            candidates = [e for e in self.tracks.values() if e.get('plays', 0) >= min_plays]
+            return heapq.nlargest(k, candidates, key=lambda e: self.decayed(e, now))
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self.tracks.values()))
+
+    def stats(self):
+        plays = self.served['cache'] + self.served['network']
+        session_plays = self.session_served['cache'] + self.session_served['network']
+        return {
+            'tracks': len(self.tracks),
+            'plays': plays,
+            'served_cache': self.served['cache'],
+            'served_network': self.served['network'],
+            'cache_ratio': (self.served['cache'] / plays) if plays else 0.0,
+            'session_cache': self.session_served['cache'],
+            'session_network': self.session_served['network'],
+            'session_cache_ratio': (self.session_served['cache'] / session_plays) if session_plays else 0.0
+        }
@@ -1,571 +1,31 @@
 import threading
 import asyncio
-import discord
-from discord.ext import commands
 import customtkinter as ctk
 import tkinter as tk
-import yt_dlp
 import os
 import time
-import logging
-import sys
-import json
-import hashlib
-from pynput import keyboard
-from pynput.keyboard import Key
-import edge_tts
-import tempfile
-from dotenv import load_dotenv
+from music_bot import MusicBot, CONFIG, TOKEN, logger
+from downloads import PRIORITY_USER
+from state_feed import INSERT, REMOVE, RESET
+from search_index import FAVORITE
 
-load_dotenv()
-
-logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', handlers=[logging.StreamHandler(sys.stdout)])
-logger = logging.getLogger('MusicBot')
-
-def load_config():
-    config = {
-        'TOKEN': os.getenv('DISCORD_TOKEN'),
-        'FFMPEG_PATH': os.getenv('FFMPEG_PATH', r"C:\ffmpeg\bin\ffmpeg.exe"),
-        'OWNER_ID': os.getenv('OWNER_ID', ''),
-        'HOTKEY': os.getenv('HOTKEY', 'home'),
-        'PREFIX': os.getenv('PREFIX', '!'),
-        'TTS': {
-            'VOICE_TR': os.getenv('VOICE_TR', "tr-TR-EmelNeural"),
-            'VOICE_EN': os.getenv('VOICE_EN', "en-US-AriaNeural")
-        }
-    }
-    
-    if not config['TOKEN']:
-        logger.error("❌ HATA: .env dosyasında DISCORD_TOKEN bulunamadı!")
-        sys.exit(1)
-    
-    logger.info("✅ Yapılandırma .env dosyasından yüklendi.")
-    return config
-
-CONFIG = load_config()
-TOKEN = CONFIG['TOKEN']
-FFMPEG_PATH = CONFIG['FFMPEG_PATH']
-CACHE_DIR = "songs_cache" 
-
-FFMPEG_OPTIONS = {'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5', 'options': '-vn'}
-YDL_OPTIONS = {
-    'format': 'bestaudio/best',
-    'noplaylist': True,
-    'quiet': True,
-    'no_warnings': True,
-    'default_search': 'ytsearch1',
-    'extractor_args': {
-        'youtube': {
-            'player_client': ['android', 'web']
-        }
-    }
-}
-
-class MusicBot(commands.Bot):
-    def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.voice_states = True
-        prefix = CONFIG.get('PREFIX', '!')
-        super().__init__(command_prefix=prefix, intents=intents)
-        self.voice_client = None
-        self.loop_mode = False
-        self.current_url = None
-        self.current_title = "Beklemede..."
-        self.volume = 1.0
-        self.duration = 0
-        self.start_offset = 0
-        self.playback_start_time = 0
-        self.accumulated_time = 0
-        self.play_lock = asyncio.Lock()
-        self.queue = []
-        self.current_data = None
-        self._manual_stop = False
-        self.is_playing_from_cache = False
-        self.favorites = self.load_favorites()
-        self.clean_orphaned_cache()
-        self._cache_check_done = False
-
-    def load_favorites(self):
-        try:
-            with open('favorites.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return []
-
-    def save_favorites(self):
-        try:
-            with open('favorites.json', 'w', encoding='utf-8') as f:
-                json.dump(self.favorites, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"Favori kaydetme hatası: {e}")
-
-    def get_cache_filename(self, url, title=None):
-        if title:
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_title = safe_title.replace(' ', '_')[:100]
-            return f"{safe_title}.mp3"
-        else:
-            url_hash = hashlib.md5(url.encode()).hexdigest()
-            return f"{url_hash}.mp3"
-
-    def get_cached_file_path(self, url, title=None):
-        if not os.path.exists(CACHE_DIR):
-            os.makedirs(CACHE_DIR)
-        return os.path.join(CACHE_DIR, self.get_cache_filename(url, title))
-
-    def is_favorite_cached(self, url, title=None):
-        cache_path = self.get_cached_file_path(url, title)
-        return os.path.exists(cache_path)
-
-    async def download_favorite_to_cache(self, url, title):
-        try:
-            cache_path = self.get_cached_file_path(url, title)
-            if os.path.exists(cache_path):
-                return cache_path
-            ffmpeg_location = os.path.dirname(FFMPEG_PATH) if os.path.exists(FFMPEG_PATH) else None
-            cache_path_without_ext = cache_path.replace('.mp3', '')
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'outtmpl': cache_path_without_ext,
-                'quiet': True,
-                'no_warnings': True,
-                'extractor_args': {
-                    'youtube': {
-                        'player_client': ['android', 'web']
-                    }
-                },
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-            }
-            if ffmpeg_location:
-                ydl_opts['ffmpeg_location'] = ffmpeg_location
-            loop = asyncio.get_event_loop()
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                await loop.run_in_executor(None, lambda: ydl.download([url]))
-            return cache_path
-        except Exception as e:
-            logger.error(f"Cache indirme hatası: {e}")
-            return None
-
-    def clean_orphaned_cache(self):
-        try:
-            if not os.path.exists(CACHE_DIR):
-                return
-            valid_filenames = set()
-            for fav in self.favorites:
-                url = fav.get('url')
-                title = fav.get('title')
-                if url and title:
-                    valid_filenames.add(self.get_cache_filename(url, title))
-            cleaned = 0
-            for filename in os.listdir(CACHE_DIR):
-                if filename not in valid_filenames:
-                    file_path = os.path.join(CACHE_DIR, filename)
-                    try:
-                        os.remove(file_path)
-                        cleaned += 1
-                    except Exception as e:
-                        logger.error(f"Cache silme hatası: {e}")
-            if cleaned > 0:
-                logger.info(f"🧹 {cleaned} orphaned cache dosyası temizlendi")
-        except Exception as e:
-            logger.error(f"Cache temizleme hatası: {e}")
-
-    def add_to_favorites(self):
-        if not self.current_url or not self.current_title:
-            return False
-        for fav in self.favorites:
-            if fav.get('url') == self.current_url:
-                return False
-        fav_data = {
-            'title': self.current_title,
-            'url': self.current_url,
-            'duration': self.duration
-        }
-        self.favorites.append(fav_data)
-        self.save_favorites()
-        logger.info(f"⭐ Favorilere eklendi: {self.current_title}")
-        asyncio.run_coroutine_threadsafe(
-            self.download_favorite_to_cache(self.current_url, self.current_title),
-            self.loop
-        )
-        return True
-
-    def remove_from_favorites(self, url):
-        fav = next((f for f in self.favorites if f.get('url') == url), None)
-        title = fav.get('title') if fav else None
-        self.favorites = [f for f in self.favorites if f.get('url') != url]
-        self.save_favorites()
-        try:
-            cache_path = self.get_cached_file_path(url, title)
-            if os.path.exists(cache_path):
-                os.remove(cache_path)
-                logger.info(f"🗑 Cache dosyası silindi")
-        except Exception as e:
-            logger.error(f"Cache silme hatası: {e}")
-
-    async def check_favorites_cache(self):
-        if not self.favorites:
-            return
-        logger.info(f"🔍 Favoriler kontrol ediliyor ({len(self.favorites)} adet)...")
-        missing_count = 0
-        cached_count = 0
-        for fav in self.favorites:
-            url = fav.get('url')
-            title = fav.get('title')
-            if not url or not title:
-                continue
-            if self.is_favorite_cached(url, title):
-                cached_count += 1
-            else:
-                missing_count += 1
-                await self.download_favorite_to_cache(url, title)
-        if missing_count > 0:
-            logger.info(f"✅ Cache hazır: {cached_count} mevcut, {missing_count} indirildi")
-
-    async def on_ready(self):
-        print(f"\n⚡ SİSTEM HAZIR: {self.user}\n")
-        await self.update_presence()
-        if not self._cache_check_done:
-            self._cache_check_done = True
-            asyncio.create_task(self.check_favorites_cache())
-    
-    async def update_presence(self, status_text=None):
-        try:
-            if status_text is None:
-                status_text = self.current_title if self.current_title != "Beklemede..." else "Beklemede..."
-            if len(status_text) > 100:
-                status_text = status_text[:97] + "..."
-            await self.change_presence(
-                activity=discord.Activity(
-                    type=discord.ActivityType.listening,
-                    name=status_text
-                )
-            )
-        except Exception as e:
-            logger.error(f"Durum güncelleme hatası: {e}")
-
-    async def play_from_cache(self, url, title, duration, start_sec=0):
-        try:
-            cache_path = self.get_cached_file_path(url, title)
-            if not os.path.exists(cache_path):
-                logger.warning(f"Cache dosyası bulunamadı, stream'e geçiliyor")
-                return await self.play_music(url, start_sec)
-            if not self.voice_client or not self.voice_client.is_connected():
-                owner_id = CONFIG.get('OWNER_ID', '')
-                if owner_id:
-                    logger.info("Bot bağlı değil, otomatik katılıyor...")
-                    channel_name = await self.join_user_channel(owner_id)
-                    if not channel_name:
-                        logger.error("Kullanıcı ses kanalında değil!")
-                        return None
-                else:
-                    logger.error("OWNER_ID config'de tanımlı değil!")
-                    return None
-            if self.voice_client.is_playing() or self.voice_client.is_paused():
-                self._manual_stop = True
-                self.voice_client.stop()
-                await asyncio.sleep(0.5)
-                self._manual_stop = False
-            self.current_title = title
-            self.current_url = url
-            self.duration = duration
-            self.start_offset = start_sec
-            self.accumulated_time = 0
-            self.is_playing_from_cache = True
-            logger.info(f"Cache'den oynatılıyor: {title} (başlangıç: {start_sec}s)")
-            def after_playing(error):
-                if error: logger.error(f"HATA: {error}")
-                if self._manual_stop: return
-                if self.loop_mode and self.current_data:
-                    asyncio.run_coroutine_threadsafe(self._play_url(self.current_data), self.loop)
-                elif self.queue:
-                    next_song = self.queue.pop(0)
-                    asyncio.run_coroutine_threadsafe(self._play_url(next_song), self.loop)
-                else:
-                    self.current_title = "Beklemede..."
-                    self.current_url = None
-                    self.duration = 0
-                    self.start_offset = 0
-                    self.accumulated_time = 0
-                    self.current_data = None
-                    self.is_playing_from_cache = False
-                    asyncio.run_coroutine_threadsafe(self.update_presence(), self.loop)
-            before_args = f'-ss {start_sec}' if start_sec > 0 else ''
-            if before_args:
-                source = discord.FFmpegPCMAudio(cache_path, executable=FFMPEG_PATH, before_options=before_args, options=FFMPEG_OPTIONS['options'])
-            else:
-                source = discord.FFmpegPCMAudio(cache_path, executable=FFMPEG_PATH, options=FFMPEG_OPTIONS['options'])
-            source = discord.PCMVolumeTransformer(source)
-            source.volume = self.volume
-            self.voice_client.play(source, after=after_playing)
-            self.playback_start_time = time.time()
-            await self.update_presence(title)
-            return title
-        except Exception as e:
-            logger.error(f"Cache oynatma hatası: {e}")
-            self.is_playing_from_cache = False
-            return None
-
-    async def join_user_channel(self, user_id):
-        if not self.is_ready(): await self.wait_until_ready()
-        for guild in self.guilds:
-            member = guild.get_member(int(user_id))
-            if member and member.voice:
-                channel = member.voice.channel
-                if self.voice_client and self.voice_client.is_connected():
-                    await self.voice_client.move_to(channel)
-                else:
-                    self.voice_client = await channel.connect()
-                return channel.name
-        return None
-
-    async def play_music(self, query, start_sec=0):
-        async with self.play_lock:
-            if not self.voice_client or not self.voice_client.is_connected():
-                owner_id = CONFIG.get('OWNER_ID', '')
-                if owner_id:
-                    logger.info("Bot bağlı değil, otomatik katlıyor...")
-                    channel_name = await self.join_user_channel(owner_id)
-                    if not channel_name:
-                        logger.error("Kullanıcı ses kanalında değil!")
-                        return None
-                else:
-                    logger.error("OWNER_ID config'de tanımlı değil!")
-                    return None
-            if self.voice_client.is_playing() or self.voice_client.is_paused():
-                self._manual_stop = True
-                self.voice_client.stop()
-                await asyncio.sleep(0.5)
-                self._manual_stop = False
-            self.start_offset = start_sec
-            self.accumulated_time = 0
-            try:
-                loop = asyncio.get_event_loop()
-                search_str = query if query.startswith(("http://", "https://")) else f"ytsearch1:{query}"
-                logger.info(f"Yükleniyor: {query}")
-                with yt_dlp.YoutubeDL(YDL_OPTIONS) as ydl:
-                    data = await loop.run_in_executor(None, lambda: ydl.extract_info(search_str, download=False))
-                if 'entries' in data:
-                    if not data['entries'] or len(data['entries']) == 0:
-                        logger.error("Arama sonuç bulunamadı!")
-                        return None
-                    data = data['entries'][0]
-                if not data or 'url' not in data:
-                    logger.error("Geçersiz video verisi!")
-                    return None
-                return await self._play_url(data, start_sec)
-            except Exception as e:
-                logger.error(f"HATA: {e}")
-                self._manual_stop = False
-                return None
-
-    async def _play_url(self, data, start_sec=0):
-        self.current_data = data
-        stream_url = data['url']
-        self.current_title = data.get('title', 'Bilinmiyor')
-        self.current_url = data.get('webpage_url', None)
-        self.duration = data.get('duration', 0)
-        self.is_playing_from_cache = False
-        header_str = "".join([f"{k}: {v}\r\n" for k, v in data.get('http_headers', {}).items()])
-        before_args = FFMPEG_OPTIONS['before_options'] + f' -headers "{header_str}" -ss {start_sec}'
-        def after_playing(error):
-            if error: logger.error(f"HATA: {error}")
-            if self._manual_stop: return
-            if self.loop_mode and self.current_data:
-                asyncio.run_coroutine_threadsafe(self._play_url(self.current_data), self.loop)
-            elif self.queue:
-                next_song = self.queue.pop(0)
-                asyncio.run_coroutine_threadsafe(self._play_url(next_song), self.loop)
-            else:
-                self.current_title = "Beklemede..."
-                self.current_url = None
-                self.duration = 0
-                self.start_offset = 0
-                self.accumulated_time = 0
-                self.current_data = None
-                asyncio.run_coroutine_threadsafe(self.update_presence(), self.loop)
-        source = discord.FFmpegPCMAudio(stream_url, executable=FFMPEG_PATH, before_options=before_args, options=FFMPEG_OPTIONS['options'])
-        source = discord.PCMVolumeTransformer(source)
-        source.volume = self.volume
-        self.voice_client.play(source, after=after_playing)
-        self.playback_start_time = time.time()
-        await self.update_presence(self.current_title)
-        return self.current_title
-
-    async def skip_track(self):
-        if self.voice_client and self.voice_client.is_playing():
-            old_loop = self.loop_mode
-            self.loop_mode = False 
-            self.voice_client.stop()
-            self.loop_mode = old_loop
-
-    async def add_to_queue(self, query):
-        try:
-            loop = asyncio.get_event_loop()
-            search_str = query if query.startswith(("http://", "https://")) else f"ytsearch1:{query}"
-            logger.info(f"Sıraya ekleniyor: {query}")
-            with yt_dlp.YoutubeDL(YDL_OPTIONS) as ydl:
-                data = await loop.run_in_executor(None, lambda: ydl.extract_info(search_str, download=False))
-            if 'entries' in data:
-                if not data['entries'] or len(data['entries']) == 0:
-                    logger.error("Arama sonuç bulunamadı!")
-                    return None
-                data = data['entries'][0]
-            if not data or 'url' not in data:
-                logger.error("Geçersiz video verisi!")
-                return None
-            self.queue.append(data)
-            title = data.get('title', 'Bilinmiyor')
-            logger.info(f"✓ Sıraya eklendi: {title}")
-            short_title = title[:40] + "..." if len(title) > 40 else title
-            return f"Sırada #{len(self.queue)}: {short_title}"
-        except Exception as e:
-            logger.error(f"Sıraya ekleme hatası: {e}")
-            return None
-
-    def get_elapsed_time(self):
-        elapsed = self.accumulated_time + self.start_offset
-        if self.voice_client and self.voice_client.is_playing():
-            elapsed += (time.time() - self.playback_start_time)
-        return int(elapsed)
-
-    def pause_music(self):
-        if self.voice_client and self.voice_client.is_playing():
-            self.accumulated_time += (time.time() - self.playback_start_time)
-            self.voice_client.pause()
-
-    def resume_music(self):
-        if self.voice_client and self.voice_client.is_paused():
-            self.playback_start_time = time.time()
-            self.voice_client.resume()
-
-    async def set_volume(self, volume):
-        self.volume = volume
-        if self.voice_client and self.voice_client.source:
-            self.voice_client.source.volume = volume
-
-    async def speak_text(self, text, language='auto', gender='female'):
-        try:
-            if not self.voice_client or not self.voice_client.is_connected():
-                owner_id = CONFIG.get('OWNER_ID', '')
-                if owner_id:
-                    channel_name = await self.join_user_channel(owner_id)
-                    if not channel_name:
-                        logger.error("Kullanıcı ses kanalında değil!")
-                        return False
-                else:
-                    logger.error("OWNER_ID config'de tanımlı değil!")
-                    return False
-            if not self.voice_client or not self.voice_client.is_connected():
-                logger.error("Voice client bağlı değil!")
-                return False
-            was_playing = self.voice_client.is_playing()
-            was_paused = self.voice_client.is_paused()
-            saved_url = self.current_url
-            saved_title = self.current_title
-            saved_duration = self.duration
-            saved_elapsed = self.get_elapsed_time() if (was_playing or was_paused) else 0
-            saved_is_cache = self.is_playing_from_cache
-            if was_playing or was_paused:
-                self._manual_stop = True
-                self.voice_client.stop()
-                await asyncio.sleep(0.5)
-                self._manual_stop = False
-            voice_tr_female = CONFIG.get('TTS', {}).get('VOICE_TR', "tr-TR-EmelNeural")
-            voice_en_female = CONFIG.get('TTS', {}).get('VOICE_EN', "en-US-AriaNeural")
-            voice_tr_male = CONFIG.get('TTS', {}).get('VOICE_TR_MALE', "tr-TR-AhmetNeural")
-            voice_en_male = CONFIG.get('TTS', {}).get('VOICE_EN_MALE', "en-US-GuyNeural")
-            target_voice_tr = voice_tr_male if gender == 'male' else voice_tr_female
-            target_voice_en = voice_en_male if gender == 'male' else voice_en_female
-            if language == 'auto':
-                turkish_chars = set('çğıöşüÇĞİÖŞÜ')
-                if any(char in text for char in turkish_chars):
-                    voice = target_voice_tr
-                else:
-                    voice = target_voice_en
-            elif language == 'tr':
-                voice = target_voice_tr
-            else:
-                voice = target_voice_en
-            temp_file = os.path.join(tempfile.gettempdir(), f"tts_{int(time.time())}.mp3")
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(temp_file)
-            if not os.path.exists(temp_file):
-                logger.error("TTS dosyası oluşturulamadı!")
-                return False
-            def after_playing(error):
-                if error:
-                    logger.error(f"TTS Oynatma Hatası: {error}")
-                try:
-                    if os.path.exists(temp_file):
-                        os.remove(temp_file)
-                except Exception as e:
-                    logger.error(f"Dosya silme hatası: {e}")
-                if saved_url and was_playing:
-                    if saved_is_cache and self.is_favorite_cached(saved_url, saved_title):
-                        asyncio.run_coroutine_threadsafe(
-                            self.play_from_cache(saved_url, saved_title, saved_duration, start_sec=saved_elapsed),
-                            self.loop
-                        )
-                    else:
-                        asyncio.run_coroutine_threadsafe(
-                            self.play_music(saved_url, start_sec=saved_elapsed),
-                            self.loop
-                        )
-                self._manual_stop = False
-            source = discord.FFmpegPCMAudio(temp_file, executable=FFMPEG_PATH)
-            source = discord.PCMVolumeTransformer(source)
-            source.volume = self.volume
-            self.voice_client.play(source, after=after_playing)
-            await asyncio.sleep(0.3)
-            if self.voice_client.is_playing():
-                return True
-            else:
-                logger.error("TTS başlatılamadı")
-                return False
-        except Exception as e:
-            logger.error(f"TTS Hatası: {e}")
-            return False
-
-bot = MusicBot()
+bot = MusicBot(control_port=CONFIG.get('CONTROL_PORT') or None)
 
 def run_bot_thread():
     bot.run(TOKEN)
 
+HOTKEYS = ('home', 'end', 'insert', 'page_down', 'page_up', 'delete') + tuple(f'f{i}' for i in range(1, 13))
+
+
 class MediaKeyListener:
     def __init__(self, app_instance):
         self.app = app_instance
         self.listener = None
         self.last_press_time = 0
         self.debounce_delay = 0.2
-        hotkey_name = CONFIG.get('HOTKEY', 'home').lower()
-        key_map = {
-            'home': Key.home,
-            'end': Key.end,
-            'insert': Key.insert,
-            'page_down': Key.page_down,
-            'page_up': Key.page_up,
-            'delete': Key.delete,
-            'f1': Key.f1,
-            'f2': Key.f2,
-            'f3': Key.f3,
-            'f4': Key.f4,
-            'f5': Key.f5,
-            'f6': Key.f6,
-            'f7': Key.f7,
-            'f8': Key.f8,
-            'f9': Key.f9,
-            'f10': Key.f10,
-            'f11': Key.f11,
-            'f12': Key.f12,
-        }
-        self.hotkey = key_map.get(hotkey_name, Key.home)
-        logger.info(f"🎹 Hotkey ayarlandı: {hotkey_name.upper()}")
+        self.hotkey_name = CONFIG.get('HOTKEY', 'home').lower()
+        self.hotkey = None
+        logger.info(f"🎹 Hotkey ayarlandı: {self.hotkey_name.upper()}")
         
     def on_press(self, key):
         try:
@@ -575,17 +35,20 @@ class MediaKeyListener:
                     return
                 self.last_press_time = current_time
                 logger.info("⏯ Hotkey: Play/Pause")
-                if bot.voice_client:
-                    if bot.voice_client.is_playing():
-                        bot.pause_music()
+                player = bot.owner_session(create=False)
+                if player and player.voice_client:
+                    if player.playback.is_playing():
+                        player.pause_music()
                         self.app.update_play_button_state("▶")
-                    elif bot.voice_client.is_paused():
-                        bot.resume_music()
+                    elif player.playback.is_paused():
+                        player.resume_music()
                         self.app.update_play_button_state("⏸")
         except AttributeError:
             pass
     
     def start(self):
+        from pynput import keyboard
+        self.hotkey = getattr(keyboard.Key, self.hotkey_name if self.hotkey_name in HOTKEYS else 'home')
         self.listener = keyboard.Listener(on_press=self.on_press)
         self.listener.start()
         logger.info("⌨️ Medya tuşu dinleyicisi başlatıldı")
@@ -594,6 +57,68 @@ class MediaKeyListener:
         if self.listener:
             self.listener.stop()
 
+LIST_POLL_MS = 200
+PROGRESS_POLL_MS = 500
+
+class TextListView:
+    def __init__(self, textbox, line_format, placeholder):
+        self.textbox = textbox
+        self.line_format = line_format
+        self.placeholder = placeholder
+        self.items = []
+        self.version = -1
+
+    def sync(self, feed, topic, read):
+        events, complete = feed.since(self.version)
+        if not complete:
+            self.version, items = feed.snapshot(read)
+            self.render(items)
+            return
+        for version, event_topic, op, index, value in events:
+            self.version = version
+            if event_topic == topic:
+                self.apply(op, index, value)
+
+    def render(self, items):
+        self.items = list(items)
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        if not self.items:
+            self.textbox.insert("1.0", self.placeholder)
+        else:
+            self.textbox.insert("1.0", "".join(self._line(i) + "\n" for i in range(len(self.items))))
+        self.textbox.configure(state="disabled")
+
+    def apply(self, op, index, value):
+        if op == RESET:
+            self.render(value)
+            return
+        was_empty = not self.items
+        if op == INSERT:
+            self.items.insert(index, value)
+            first_dirty = index + 1
+        elif op == REMOVE:
+            del self.items[index]
+            first_dirty = index
+        else:
+            self.items[index] = value
+            first_dirty = index
+        if was_empty or not self.items:
+            self.render(self.items)
+            return
+        self.textbox.configure(state="normal")
+        if op == INSERT:
+            self.textbox.insert(f"{index + 1}.0", self._line(index) + "\n")
+        elif op == REMOVE:
+            self.textbox.delete(f"{index + 1}.0", f"{index + 2}.0")
+        for i in range(first_dirty, len(self.items)):
+            self.textbox.delete(f"{i + 1}.0", f"{i + 1}.end")
+            self.textbox.insert(f"{i + 1}.0", self._line(i))
+        self.textbox.configure(state="disabled")
+
+    def _line(self, i):
+        return self.line_format(i + 1, self.items[i])
+
 class App(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -683,8 +208,17 @@ class App(ctk.CTk):
                                         border_width=0,
                                         corner_radius=8,
                                         font=ctk.CTkFont(size=13))
-        self.entry_search.pack(fill="x", pady=(0, 12))
+        self.entry_search.pack(fill="x", pady=(0, 4))
         self.entry_search.bind("<Return>", lambda e: self.play_track())
+        self.entry_search.bind("<Shift-Return>", lambda e: self.play_track(network=True))
+        self.entry_search.bind("<KeyRelease>", self.update_suggestion)
+        self.suggestion = None
+        self.lbl_suggest = ctk.CTkLabel(self.main_frame, text="", anchor="w", height=18,
+                                       font=ctk.CTkFont(size=11),
+                                       text_color=self.colors['accent_dim'],
+                                       cursor="hand2")
+        self.lbl_suggest.pack(fill="x", pady=(0, 8))
+        self.lbl_suggest.bind("<Button-1>", lambda e: self.play_suggestion())
         self.search_btn_frame = ctk.CTkFrame(self.main_frame, fg_color="transparent")
         self.search_btn_frame.pack(fill="x", pady=(0, 18))
         self.btn_search = ctk.CTkButton(self.search_btn_frame, text="▶ OYNAT", 
@@ -828,9 +362,14 @@ class App(ctk.CTk):
                                       font=ctk.CTkFont(size=16),
                                       command=self.speak_text)
         self.btn_speak.pack(side="right", padx=(15, 0))
+        self.queue_view = TextListView(self.queue_textbox, lambda i, track: f"{i}. {track.title[:35]}", "Sıra boş")
+        self.fav_view = TextListView(self.fav_textbox, lambda i, fav: f"{i:2d}. {fav.get('title', 'Bilinmiyor')[:30]}", "Favori yok\n\nÇalan şarkıyı ⭐ ile ekle")
+        self.queue_view.render([])
+        self.player = None
+        self.now_playing_version = -1
         self.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.media_listener = MediaKeyListener(self)
-        self.media_listener.start()
+        self.after(100, self.media_listener.start)
 
     def update_play_button_state(self, state):
         try:
@@ -840,71 +379,62 @@ class App(ctk.CTk):
     
     def update_ui_loop(self):
         try:
-            if bot.voice_client:
-                if bot.voice_client.is_playing():
-                    if self.btn_play.cget("text") != "⏸":
-                        self.btn_play.configure(text="⏸")
-                elif bot.voice_client.is_paused():
-                    if self.btn_play.cget("text") != "▶":
-                        self.btn_play.configure(text="▶")
-                else:
-                    if self.btn_play.cget("text") != "▶":
-                        self.btn_play.configure(text="▶")
-            if bot.voice_client and bot.voice_client.is_playing() and not self.is_seeking:
-                elapsed = bot.get_elapsed_time()
-                total = bot.duration
-                if total > 0:
-                    self.slider_seek.set((elapsed / total) * 100)
-                    e_m, e_s = divmod(elapsed, 60)
-                    t_m, t_s = divmod(total, 60)
-                    self.lbl_timer.configure(text=f"{e_m:02d}:{e_s:02d} / {t_m:02d}:{t_s:02d}")
-            title_text = bot.current_title[:60] + "..." if len(bot.current_title) > 60 else bot.current_title
-            self.lbl_title.configure(text=title_text)
-            self.update_queue_display()
-            self.update_favorites_display()
+            player = bot.owner_session(create=False)
+            if player is not self.player:
+                self.player = player
+                self.queue_view.version = -1
+                self.now_playing_version = -1
+                if player is None:
+                    self.queue_view.render([])
+            if player is not None:
+                self.queue_view.sync(player.feed, 'queue', lambda: list(player.queue))
+                self.update_now_playing(player)
+            self.fav_view.sync(bot.feed, 'favorites', lambda: list(bot.favorites))
         except: pass
-        self.after(1000, self.update_ui_loop)
+        self.after(LIST_POLL_MS, self.update_ui_loop)
 
-    def update_queue_display(self):
-        self.queue_textbox.configure(state="normal")
-        self.queue_textbox.delete("1.0", "end")
-        if not bot.queue:
-            self.queue_textbox.insert("1.0", "Sıra boş")
-        else:
-            for i, song_data in enumerate(bot.queue, 1):
-                title = song_data.get('title', 'Bilinmiyor')[:35]
-                self.queue_textbox.insert("end", f"{i}. {title}\n")
-        self.queue_textbox.configure(state="disabled")
+    def update_now_playing(self, player):
+        if player.feed.version == self.now_playing_version:
+            return
+        self.now_playing_version = player.feed.version
+        title_text = player.current_title[:60] + "..." if len(player.current_title) > 60 else player.current_title
+        if self.lbl_title.cget("text") != title_text:
+            self.lbl_title.configure(text=title_text)
 
-    def update_favorites_display(self):
+    def update_progress_loop(self):
         try:
-            scroll_pos = self.fav_textbox.yview()
-        except:
-            scroll_pos = None
-        self.fav_textbox.configure(state="normal")
-        self.fav_textbox.delete("1.0", "end")
-        if not bot.favorites:
-            self.fav_textbox.insert("1.0", "Favori yok\n\nÇalan şarkıyı ⭐ ile ekle")
-        else:
-            for i, fav in enumerate(bot.favorites, 1):
-                title = fav.get('title', 'Bilinmiyor')[:30]
-                self.fav_textbox.insert("end", f"{i:2d}. {title}\n")
-        self.fav_textbox.configure(state="disabled")
-        if scroll_pos:
-            try:
-                self.fav_textbox.yview_moveto(scroll_pos[0])
-            except:
-                pass
+            player = self.player
+            if player is not None:
+                self.update_progress(player)
+        except: pass
+        self.after(PROGRESS_POLL_MS, self.update_progress_loop)
+
+    def update_progress(self, player):
+        if player.voice_client:
+            state = "⏸" if player.playback.is_playing() else "▶"
+            if self.btn_play.cget("text") != state:
+                self.btn_play.configure(text=state)
+        if player.playback.is_playing() and not self.is_seeking:
+            elapsed = player.get_elapsed_time()
+            total = player.duration
+            if total > 0:
+                e_m, e_s = divmod(elapsed, 60)
+                t_m, t_s = divmod(total, 60)
+                timer_text = f"{e_m:02d}:{e_s:02d} / {t_m:02d}:{t_s:02d}"
+                if self.lbl_timer.cget("text") != timer_text:
+                    self.slider_seek.set((elapsed / total) * 100)
+                    self.lbl_timer.configure(text=timer_text)
 
     def on_favorite_click(self, event):
         try:
-            if not bot.favorites:
+            favorites = self.fav_view.items
+            if not favorites:
                 return
             index = self.fav_textbox.index("@%s,%s" % (event.x, event.y))
             line_num = int(index.split('.')[0]) - 1
-            if line_num < 0 or line_num >= len(bot.favorites):
+            if line_num < 0 or line_num >= len(favorites):
                 return
-            fav = bot.favorites[line_num]
+            fav = favorites[line_num]
             url = fav.get('url')
             title = fav.get('title', 'Bilinmiyor')
             duration = fav.get('duration', 0)
@@ -912,12 +442,13 @@ class App(ctk.CTk):
                 return
             if event.num == 1:
                 self.lbl_status.configure(text="Favoriden yükleniyor...", text_color="gold")
-                if bot.is_favorite_cached(url, title):
+                if bot.is_cached(url):
                     asyncio.run_coroutine_threadsafe(
                         self.play_from_cache_task(url, title, duration), 
                         bot.loop
                     )
                 else:
+                    bot.loop.call_soon_threadsafe(bot.schedule_cache_download, url, title, PRIORITY_USER)
                     asyncio.run_coroutine_threadsafe(
                         self.update_info_task(url), 
                         bot.loop
@@ -940,7 +471,7 @@ class App(ctk.CTk):
                                   relief='flat')
             context_menu.add_command(
                 label="📝 İsim Değiştir",
-                command=lambda: self.rename_favorite(line_num, url, title)
+                command=lambda: self.rename_favorite(url, title)
             )
             context_menu.add_separator()
             context_menu.add_command(
@@ -956,7 +487,7 @@ class App(ctk.CTk):
             except:
                 pass
     
-    def rename_favorite(self, line_num, url, old_title):
+    def rename_favorite(self, url, old_title):
         try:
             dialog = ctk.CTkInputDialog(
                 text=f"Yeni isim girin:\n\nEski: {old_title[:50]}...",
@@ -964,17 +495,7 @@ class App(ctk.CTk):
             )
             new_title = dialog.get_input()
             if new_title and new_title.strip():
-                if 0 <= line_num < len(bot.favorites):
-                    bot.favorites[line_num]['title'] = new_title.strip()
-                    bot.save_favorites()
-                    old_cache_path = bot.get_cached_file_path(url, old_title)
-                    new_cache_path = bot.get_cached_file_path(url, new_title)
-                    if os.path.exists(old_cache_path) and old_cache_path != new_cache_path:
-                        try:
-                            os.rename(old_cache_path, new_cache_path)
-                            logger.info(f"📝 Cache dosyası yeniden adlandırıldı")
-                        except Exception as e:
-                            logger.warning(f"Cache yeniden adlandırma hatası: {e}")
+                if bot.rename_favorite(url, new_title.strip()):
                     self.lbl_status.configure(text="İsim değiştirildi", text_color="green")
                     logger.info(f"Favori yeniden adlandırıldı: {old_title} → {new_title}")
         except Exception as e:
@@ -989,60 +510,60 @@ class App(ctk.CTk):
             logger.error(f"Silme hatası: {e}")
 
     def toggle_favorite(self):
-        if bot.add_to_favorites():
+        player = bot.owner_session(create=False)
+        if player and bot.add_to_favorites(player.current_url, player.current_title, player.duration):
             self.lbl_status.configure(text="⭐ Favorilere eklendi", text_color="gold")
         else:
             self.lbl_status.configure(text="Zaten favorilerde", text_color="orange")
 
     def on_seek_drag(self, value):
-        if bot.duration > 0:
-            elapsed = int((value / 100) * bot.duration)
+        player = bot.owner_session(create=False)
+        if player and player.duration > 0:
+            elapsed = int((value / 100) * player.duration)
             e_m, e_s = divmod(elapsed, 60)
             self.lbl_timer.configure(text=f"{e_m:02d}:{e_s:02d} / --:--")
 
     def on_seek_release(self, event):
         value = self.slider_seek.get()
-        if bot.current_url and bot.duration > 0:
-            target_sec = int((value / 100) * bot.duration)
-            if bot.is_playing_from_cache and bot.is_favorite_cached(bot.current_url, bot.current_title):
-                fav = next((f for f in bot.favorites if f.get('url') == bot.current_url), None)
-                if fav:
-                    asyncio.run_coroutine_threadsafe(
-                        bot.play_from_cache(bot.current_url, fav.get('title'), fav.get('duration', 0), start_sec=target_sec),
-                        bot.loop
-                    )
-                else:
-                    asyncio.run_coroutine_threadsafe(bot.play_music(bot.current_url, start_sec=target_sec), bot.loop)
-            else:
-                asyncio.run_coroutine_threadsafe(bot.play_music(bot.current_url, start_sec=target_sec), bot.loop)
+        player = bot.owner_session(create=False)
+        if player and player.current_url and player.duration > 0:
+            target_sec = int((value / 100) * player.duration)
+            asyncio.run_coroutine_threadsafe(player.seek(target_sec), bot.loop)
         self.after(500, lambda: setattr(self, 'is_seeking', False))
 
     def change_volume(self, value):
-        asyncio.run_coroutine_threadsafe(bot.set_volume(value), bot.loop)
+        player = bot.owner_session(create=False)
+        if player:
+            asyncio.run_coroutine_threadsafe(player.set_volume(value), bot.loop)
 
     def toggle_pause(self):
+        player = bot.owner_session(create=False)
+        if not player:
+            return
         if self.btn_play.cget("text") == "⏸": 
             self.btn_play.configure(text="▶")
-            bot.pause_music()
+            player.pause_music()
         else:
             self.btn_play.configure(text="⏸")
-            bot.resume_music()
+            player.resume_music()
 
     def toggle_loop(self):
-        bot.loop_mode = bool(self.switch_loop.get())
+        player = bot.owner_session(create=False)
+        if player:
+            player.loop_mode = bool(self.switch_loop.get())
 
     def stop_track(self):
-        if bot.voice_client:
-            bot._manual_stop = True
-            bot.voice_client.stop()
-            bot.current_url = None
-            threading.Timer(1.0, lambda: setattr(bot, '_manual_stop', False)).start()
+        player = bot.owner_session(create=False)
+        if player and player.voice_client:
+            asyncio.run_coroutine_threadsafe(player.stop_music(), bot.loop)
         self.btn_play.configure(text="▶")
         self.slider_seek.set(0)
         self.lbl_timer.configure(text="00:00 / 00:00")
 
     def skip_track(self):
-        asyncio.run_coroutine_threadsafe(bot.skip_track(), bot.loop)
+        player = bot.owner_session(create=False)
+        if player:
+            asyncio.run_coroutine_threadsafe(player.skip_track(), bot.loop)
 
     def join_voice(self):
         owner_id = CONFIG.get('OWNER_ID', "")
@@ -1050,7 +571,10 @@ class App(ctk.CTk):
         asyncio.run_coroutine_threadsafe(self.update_join_task(owner_id), bot.loop)
 
     async def update_join_task(self, user_id):
-        name = await bot.join_user_channel(user_id)
+        if not bot.is_ready():
+            await bot.wait_until_ready()
+        player = bot.owner_session()
+        name = await player.join_user_channel(user_id) if player else None
         if name: 
             short_name = name[:25] + "..." if len(name) > 25 else name
             self.lbl_status.configure(text=f"Bağlı: {short_name}", text_color="#3B8ED0")
@@ -1064,22 +588,48 @@ class App(ctk.CTk):
             asyncio.run_coroutine_threadsafe(self.update_queue_task(query), bot.loop)
 
     async def update_queue_task(self, query):
-        result = await bot.add_to_queue(query)
+        player = bot.owner_session()
+        result = await player.add_to_queue(query) if player else None
         if result:
             short_result = result[:50] + "..." if len(result) > 50 else result
             self.lbl_status.configure(text=short_result, text_color="#3B8ED0")
         else:
             self.lbl_status.configure(text="Sıraya eklenemedi", text_color="red")
 
-    def play_track(self):
+    def update_suggestion(self, event=None):
+        if event is not None and event.keysym in ('Return', 'Shift_L', 'Shift_R'):
+            return
+        query = self.entry_search.get().strip()
+        results = bot.search.search(query, limit=1) if query else []
+        self.suggestion = results[0][0] if results else None
+        if self.suggestion is None:
+            self.lbl_suggest.configure(text="")
+            return
+        icon = '⭐' if FAVORITE in self.suggestion.sources else '💾' if bot.is_cached(self.suggestion.url) else '🕘'
+        if bot.search.best(query) is self.suggestion:
+            text = f"⚡ Enter: {icon} {self.suggestion.title}   ·   Shift+Enter: YouTube"
+            color = self.colors['accent']
+        else:
+            text = f"🔍 Enter: YouTube   ·   yerel öneri (tıkla): {icon} {self.suggestion.title}"
+            color = self.colors['accent_dim']
+        self.lbl_suggest.configure(text=text[:110], text_color=color)
+
+    def play_suggestion(self):
+        if self.suggestion:
+            self.lbl_status.configure(text="Yükleniyor...", text_color=self.colors['accent_dim'])
+            self.btn_play.configure(text="⏸")
+            asyncio.run_coroutine_threadsafe(self.update_info_task(self.suggestion.url), bot.loop)
+
+    def play_track(self, network=False):
         query = self.entry_search.get()
         if query:
             self.lbl_status.configure(text="Yükleniyor...", text_color=self.colors['accent_dim'])
             self.btn_play.configure(text="⏸")
-            asyncio.run_coroutine_threadsafe(self.update_info_task(query), bot.loop)
+            asyncio.run_coroutine_threadsafe(self.update_info_task(query, network), bot.loop)
 
-    async def update_info_task(self, query):
-        title = await bot.play_music(query)
+    async def update_info_task(self, query, network=False):
+        player = bot.owner_session()
+        title = await player.play_music(query, network=network) if player else None
         if title:
             self.lbl_status.configure(text="Oynatılıyor", text_color=self.colors['accent'])
         else:
@@ -1087,7 +637,8 @@ class App(ctk.CTk):
             self.btn_play.configure(text="▶")
 
     async def play_from_cache_task(self, url, title, duration):
-        result = await bot.play_from_cache(url, title, duration)
+        player = bot.owner_session()
+        result = await player.play_from_cache(url, title, duration) if player else None
         if result:
             self.lbl_status.configure(text="Cache'den oynatılıyor", text_color=self.colors['accent'])
             self.btn_play.configure(text="⏸")
@@ -1105,7 +656,8 @@ class App(ctk.CTk):
         asyncio.run_coroutine_threadsafe(self.speak_text_task(text, language, gender), bot.loop)
 
     async def speak_text_task(self, text, language, gender):
-        success = await bot.speak_text(text, language, gender)
+        player = bot.owner_session()
+        success = await player.speak_text(text, language, gender) if player else False
         if success:
             self.lbl_status.configure(text="✓ Seslendirildi", text_color=self.colors['accent'])
             self.entry_tts.delete(0, 'end')
@@ -1116,7 +668,6 @@ class App(ctk.CTk):
         try:
             if hasattr(self, 'media_listener'):
                 self.media_listener.stop()
-            if bot.voice_client: asyncio.run_coroutine_threadsafe(bot.voice_client.disconnect(), bot.loop)
             asyncio.run_coroutine_threadsafe(bot.close(), bot.loop)
         except: pass
         self.destroy()
@@ -1127,4 +678,5 @@ if __name__ == "__main__":
     t.start()
     app = App()
     app.after(1000, app.update_ui_loop)
+    app.after(1000, app.update_progress_loop)
     app.mainloop()
\ No newline at end of file
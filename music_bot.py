@@ -0,0 +1,646 @@
+import time
+STARTED_AT = time.perf_counter()
+import asyncio
+import discord
+from discord.ext import commands
+import os
+import importlib
+import logging
+import sys
+import math
+import re
+from dotenv import load_dotenv
+from resolve_cache import ResolutionCache
+from extraction import ExtractionService
+from audio import UNITY_TOLERANCE, loudness_gain
+from downloads import DownloadScheduler, PRIORITY_USER, PRIORITY_WARMUP
+from song_cache import CacheStore
+from session import PlayerSession, IDLE_TITLE
+from state_feed import ChangeFeed
+from player_commands import PlayerCommands
+from control_api import ControlServer
+from tts_cache import TTSCache, choose_voice
+from favorites import FavoritesStore
+from search_index import SearchIndex, FAVORITE, CACHE, HISTORY
+from history import PlayHistory, history_key
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s', handlers=[logging.StreamHandler(sys.stdout)])
+logger = logging.getLogger('MusicBot')
+
+def load_config():
+    loudness_target = os.getenv('LOUDNESS_TARGET', '-14').strip().lower()
+    config = {
+        'TOKEN': os.getenv('DISCORD_TOKEN'),
+        'FFMPEG_PATH': os.getenv('FFMPEG_PATH', r"C:\ffmpeg\bin\ffmpeg.exe"),
+        'OWNER_ID': os.getenv('OWNER_ID', ''),
+        'HOTKEY': os.getenv('HOTKEY', 'home'),
+        'PREFIX': os.getenv('PREFIX', '!'),
+        'LOOKUP_WORKERS': int(os.getenv('LOOKUP_WORKERS', '3')),
+        'DOWNLOAD_WORKERS': int(os.getenv('DOWNLOAD_WORKERS', '2')),
+        'PREFETCH_SECONDS': int(os.getenv('PREFETCH_SECONDS', '15')),
+        'PREFETCH_BUFFER_MS': int(os.getenv('PREFETCH_BUFFER_MS', '400')),
+        'CROSSFADE_MS': int(os.getenv('CROSSFADE_MS', '0')),
+        'CACHE_FORMAT': os.getenv('CACHE_FORMAT', 'opus').lower(),
+        'CACHE_MAX_MB': int(os.getenv('CACHE_MAX_MB', '2048')),
+        'CACHE_PLAY_THRESHOLD': int(os.getenv('CACHE_PLAY_THRESHOLD', '3')),
+        'PRECACHE_TOP_K': int(os.getenv('PRECACHE_TOP_K', '100')),
+        'PRECACHE_INTERVAL': int(os.getenv('PRECACHE_INTERVAL', '600')),
+        'HISTORY_HALF_LIFE_DAYS': float(os.getenv('HISTORY_HALF_LIFE_DAYS', '14')),
+        'PCM_TIER_MB': int(os.getenv('PCM_TIER_MB', '0')),
+        'PCM_MIN_HITS': int(os.getenv('PCM_MIN_HITS', '3')),
+        'LOUDNESS_TARGET': None if loudness_target in ('', 'off') else float(loudness_target),
+        'SHARDED': os.getenv('SHARDED', '0').lower() in ('1', 'true', 'yes'),
+        'SESSION_IDLE_SECONDS': int(os.getenv('SESSION_IDLE_SECONDS', '300')),
+        'CONTROL_HOST': os.getenv('CONTROL_HOST', '127.0.0.1'),
+        'CONTROL_PORT': int(os.getenv('CONTROL_PORT', '0')),
+        'CONTROL_TOKEN': os.getenv('CONTROL_TOKEN', ''),
+        'PLAYLIST_LIMIT': int(os.getenv('PLAYLIST_LIMIT', '1000')),
+        'DUCK_DB': float(os.getenv('DUCK_DB', '-12')),
+        'DUCK_ATTACK_MS': int(os.getenv('DUCK_ATTACK_MS', '80')),
+        'DUCK_RELEASE_MS': int(os.getenv('DUCK_RELEASE_MS', '400')),
+        'STREAM_REFRESH_AHEAD': int(os.getenv('STREAM_REFRESH_AHEAD', '900')),
+        'PLAYLIST_RESOLVE_AHEAD': int(os.getenv('PLAYLIST_RESOLVE_AHEAD', '2')),
+        'RESOLVE_CACHE_TTL': int(os.getenv('RESOLVE_CACHE_TTL', str(7 * 24 * 60 * 60))),
+        'TTS': {
+            'VOICE_TR': os.getenv('VOICE_TR', "tr-TR-EmelNeural"),
+            'VOICE_EN': os.getenv('VOICE_EN', "en-US-AriaNeural"),
+            'RATE': os.getenv('TTS_RATE', '+0%'),
+            'PITCH': os.getenv('TTS_PITCH', '+0Hz'),
+            'CACHE_MB': int(os.getenv('TTS_CACHE_MB', '64')),
+            'STREAMING': os.getenv('TTS_STREAMING', '1').lower() in ('1', 'true', 'yes'),
+            'PHRASES': [p.strip() for p in os.getenv('TTS_PHRASES', '').split('|') if p.strip()]
+        }
+    }
+    
+    if not config['TOKEN']:
+        logger.error("❌ HATA: .env dosyasında DISCORD_TOKEN bulunamadı!")
+        sys.exit(1)
+    
+    logger.info("✅ Yapılandırma .env dosyasından yüklendi.")
+    return config
+
+CONFIG = load_config()
+TOKEN = CONFIG['TOKEN']
+FFMPEG_PATH = CONFIG['FFMPEG_PATH']
+CACHE_DIR = "songs_cache" 
+TTS_CACHE_DIR = "tts_cache"
+BACKGROUND_IMPORTS = ('yt_dlp', 'edge_tts')
+
+YDL_OPTIONS = {
+    'format': 'bestaudio/best',
+    'noplaylist': True,
+    'quiet': True,
+    'no_warnings': True,
+    'default_search': 'ytsearch1',
+    'extractor_args': {
+        'youtube': {
+            'player_client': ['android', 'web']
+        }
+    }
+}
+
+BotBase = commands.AutoShardedBot if CONFIG.get('SHARDED') else commands.Bot
+
+class MusicBot(BotBase):
+    def __init__(self, control_port=None):
+        intents = discord.Intents.default()
+        intents.message_content = True
+        intents.voice_states = True
+        prefix = CONFIG.get('PREFIX', '!')
+        super().__init__(command_prefix=prefix, intents=intents)
+        self.config = CONFIG
+        self.owner_id = CONFIG.get('OWNER_ID', '')
+        self.sessions = {}
+        self._owner_guild_id = None
+        self._prefetch_tasks = {}
+        self.feed = ChangeFeed()
+        self.control = ControlServer(self, host=CONFIG.get('CONTROL_HOST', '127.0.0.1'), port=control_port, token=CONFIG.get('CONTROL_TOKEN', '')) if control_port else None
+        self.extractor = ExtractionService(
+            YDL_OPTIONS,
+            lookup_workers=CONFIG.get('LOOKUP_WORKERS', 3),
+            download_workers=CONFIG.get('DOWNLOAD_WORKERS', 2)
+        )
+        self.downloads = DownloadScheduler(
+            self.download_favorite_to_cache,
+            workers=CONFIG.get('DOWNLOAD_WORKERS', 2)
+        )
+        self.tts = TTSCache(TTS_CACHE_DIR, max_bytes=CONFIG['TTS']['CACHE_MB'] * 1024 ** 2)
+        self.stream_stats = {'refreshes': 0, 'background': 0, 'forced': 0, 'recoveries': 0, 'failures': 0}
+        self.resolve_cache = ResolutionCache(ttl=CONFIG.get('RESOLVE_CACHE_TTL', 7 * 24 * 60 * 60))
+        self.song_cache = CacheStore(
+            CACHE_DIR,
+            max_bytes=CONFIG.get('CACHE_MAX_MB', 2048) * 1024 ** 2,
+            pcm_max_bytes=CONFIG.get('PCM_TIER_MB', 0) * 1024 ** 2,
+            pcm_min_hits=CONFIG.get('PCM_MIN_HITS', 3)
+        )
+        self._pcm_builds = set()
+        self._loudness_jobs = set()
+        self.loudness_target = CONFIG.get('LOUDNESS_TARGET')
+        self.favorites = FavoritesStore('favorites.json', feed=self.feed)
+        self.search = SearchIndex()
+        self.history = PlayHistory('history.json', half_life=CONFIG.get('HISTORY_HALF_LIFE_DAYS', 14) * 24 * 60 * 60)
+        self.precache_stats = {'scheduled': 0, 'evicted': 0, 'skipped_budget': 0}
+        self._precache_task = None
+        self.search_stats = {'local': 0, 'network': 0, 'forced': 0}
+        self._cache_ready = None
+        self._cache_check_done = False
+        self.startup = {'constructed': time.perf_counter() - STARTED_AT}
+
+    def is_cached(self, url):
+        return self.song_cache.has(url)
+
+    def is_favorite(self, url):
+        return url in self.favorites
+
+    async def download_favorite_to_cache(self, url, title):
+        try:
+            if self.song_cache.has(url):
+                return self.song_cache.path_for(url)
+            codec = 'opus' if CONFIG.get('CACHE_FORMAT', 'opus') == 'opus' else 'mp3'
+            cache_path = self.song_cache.path_for(url, ext=codec)
+            ffmpeg_location = os.path.dirname(FFMPEG_PATH) if os.path.exists(FFMPEG_PATH) else None
+            cache_path_without_ext = os.path.splitext(cache_path)[0]
+            ydl_opts = {
+                'format': 'bestaudio[acodec=opus]/bestaudio/best' if codec == 'opus' else 'bestaudio/best',
+                'outtmpl': cache_path_without_ext,
+                'quiet': True,
+                'no_warnings': True,
+                'extractor_args': {
+                    'youtube': {
+                        'player_client': ['android', 'web']
+                    }
+                },
+                'postprocessors': [{
+                    'key': 'FFmpegExtractAudio',
+                    'preferredcodec': codec,
+                    'preferredquality': '192',
+                }],
+            }
+            if ffmpeg_location:
+                ydl_opts['ffmpeg_location'] = ffmpeg_location
+            info = await self.extractor.download(url, ydl_opts, key=cache_path)
+            duration = (info or {}).get('duration', 0)
+            path = self.song_cache.add(url, cache_path, title=title, duration=duration, codec=codec, pinned=self.is_favorite(url))
+            if path:
+                self.search.add(url, title, CACHE, duration)
+                await self.measure_loudness(url, path)
+            return path
+        except Exception as e:
+            logger.error(f"Cache indirme hatası: {e}")
+            return None
+
+    def schedule_cache_download(self, url, title, priority=PRIORITY_WARMUP):
+        return self.downloads.submit(self.song_cache.path_for(url), url, title, priority)
+
+    def record_play(self, url, title, duration=0, cached=False):
+        entry = self.history.record(url, title, duration, cached)
+        if not entry:
+            return
+        self.search.add(url, title, HISTORY, duration)
+        if not cached and entry['plays'] >= CONFIG.get('CACHE_PLAY_THRESHOLD', 3):
+            self.request_precache()
+
+    def request_precache(self):
+        if self._precache_task is None or self._precache_task.done():
+            self._precache_task = asyncio.create_task(self.precache_popular())
+
+    async def precache_popular(self):
+        top = self.history.top(CONFIG.get('PRECACHE_TOP_K', 100), min_plays=CONFIG.get('CACHE_PLAY_THRESHOLD', 3))
+        wanted = {history_key(entry['url']) for entry in top}
+        rate = self.song_cache.bytes_per_second()
+        reserved = 0
+        scheduled = 0
+        for entry in top:
+            url = entry['url']
+            if self.song_cache.has(url) or self.song_cache.path_for(url) in self.downloads.jobs:
+                continue
+            needed = (entry.get('duration') or 240) * rate
+            budget = self.song_cache.max_bytes - reserved - needed
+            if self.song_cache.total_bytes() > budget:
+                self.precache_stats['evicted'] += self.song_cache.evict(budget, keep=wanted)
+                if self.song_cache.total_bytes() > budget:
+                    self.precache_stats['skipped_budget'] += 1
+                    break
+            reserved += needed
+            self.schedule_cache_download(url, entry.get('title') or url, PRIORITY_WARMUP)
+            scheduled += 1
+        if scheduled:
+            self.precache_stats['scheduled'] += scheduled
+            stats = self.history.stats()
+            logger.info(
+                f"🔮 Sık/son çalınan {scheduled} şarkı cache'e alınıyor (ilk {len(top)}) | "
+                f"çalmalar: cache {stats['served_cache']}, ağ {stats['served_network']} (%{stats['cache_ratio'] * 100:.0f} cache)"
+            )
+        return scheduled
+
+    async def precache_loop(self):
+        if self._cache_ready is not None:
+            await self._cache_ready
+        while not self.is_closed():
+            try:
+                await self.precache_popular()
+            except Exception as e:
+                logger.error(f"Ön cache hatası: {e}")
+            await asyncio.sleep(max(30, CONFIG.get('PRECACHE_INTERVAL', 600)))
+
+    def migrate_legacy_cache(self):
+        try:
+            migrated = 0
+            for fav in self.favorites:
+                url = fav.get('url')
+                title = fav.get('title')
+                if not url or not title:
+                    continue
+                if self.song_cache.has(url):
+                    self.song_cache.pin(url)
+                    continue
+                safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+                legacy_path = os.path.join(CACHE_DIR, safe_title.replace(' ', '_')[:100] + ".mp3")
+                if os.path.exists(legacy_path) and self.song_cache.adopt(url, legacy_path, title=title, duration=fav.get('duration', 0), pinned=True):
+                    migrated += 1
+            if migrated > 0:
+                logger.info(f"📦 {migrated} eski cache dosyası yeni düzene taşındı")
+            self.song_cache.reconcile()
+        except Exception as e:
+            logger.error(f"Cache taşıma hatası: {e}")
+
+    def add_to_favorites(self, url, title, duration=0):
+        if not self.favorites.add(url, title, duration):
+            return False
+        self.search.add(url, title, FAVORITE, duration)
+        logger.info(f"⭐ Favorilere eklendi: {title}")
+        if self.song_cache.has(url):
+            self.song_cache.pin(url)
+        else:
+            self.loop.call_soon_threadsafe(self.schedule_cache_download, url, title, PRIORITY_USER)
+        return True
+
+    def remove_from_favorites(self, url):
+        self.favorites.remove(url)
+        self.search.discard(url, FAVORITE)
+        if self.song_cache.has(url):
+            self.song_cache.pin(url, False)
+            logger.info(f"🗑 Cache dosyası sabitlemesi kaldırıldı, LRU ile silinebilir")
+
+    def rename_favorite(self, url, title):
+        if not self.favorites.rename(url, title):
+            return False
+        self.search.rename(url, title)
+        self.song_cache.set_title(url, title)
+        return True
+
+    async def check_favorites_cache(self):
+        if self._cache_ready is not None:
+            await self._cache_ready
+        if not self.favorites:
+            return
+        logger.info(f"🔍 Favoriler kontrol ediliyor ({len(self.favorites)} adet)...")
+        missing_count = 0
+        cached_count = 0
+        for fav in self.favorites:
+            url = fav.get('url')
+            title = fav.get('title')
+            if not url or not title:
+                continue
+            if self.song_cache.has(url):
+                cached_count += 1
+            else:
+                missing_count += 1
+                self.schedule_cache_download(url, title, PRIORITY_WARMUP)
+        if missing_count > 0:
+            logger.info(f"📥 {missing_count} favori indirme kuyruğuna alındı ({self.downloads.worker_count} paralel)")
+            await self.downloads.join()
+            progress = self.downloads.progress()
+            logger.info(f"✅ Cache hazır: {cached_count} mevcut, {progress['completed']} indirildi, {progress['failed']} hata ({progress['elapsed']:.0f}s)")
+
+    async def setup_hook(self):
+        self.startup['setup_hook'] = time.perf_counter() - STARTED_AT
+        loop = asyncio.get_running_loop()
+        self._cache_ready = loop.run_in_executor(None, self.migrate_legacy_cache)
+        loop.run_in_executor(None, self.warm_imports)
+        loop.run_in_executor(None, self.build_search_index)
+        asyncio.create_task(self.preload_tts())
+        await self.add_cog(PlayerCommands(self))
+        if self.control:
+            await self.control.start()
+
+    async def preload_tts(self):
+        tts_config = self.config['TTS']
+        await self.tts.preload(
+            tts_config['PHRASES'],
+            lambda text: choose_voice(tts_config, text),
+            tts_config['RATE'],
+            tts_config['PITCH']
+        )
+
+    def warm_imports(self):
+        started = time.perf_counter()
+        for name in BACKGROUND_IMPORTS:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logger.warning(f"{name} önceden yüklenemedi: {e}")
+        try:
+            self.extractor.preload()
+        except Exception as e:
+            logger.warning(f"yt-dlp önceden hazırlanamadı: {e}")
+        self.startup['warm_imports'] = time.perf_counter() - started
+        logger.info(f"🔥 Ağır modüller arka planda yüklendi ({self.startup['warm_imports'] * 1000:.0f}ms)")
+
+    def build_search_index(self):
+        started = time.perf_counter()
+        for fav in self.favorites:
+            self.search.add(fav.get('url'), fav.get('title'), FAVORITE, fav.get('duration', 0))
+        for entry in list(self.song_cache.entries.values()):
+            self.search.add(entry.get('url'), entry.get('title'), CACHE, entry.get('duration', 0))
+        for entry in list(self.resolve_cache.entries.values()):
+            self.search.add(entry.get('webpage_url'), entry.get('title'), HISTORY, entry.get('duration', 0))
+        for entry in self.history:
+            self.search.add(entry.get('url'), entry.get('title'), HISTORY, entry.get('duration', 0))
+        self.startup['search_index'] = time.perf_counter() - started
+        logger.info(f"🔎 Yerel arama indeksi hazır: {len(self.search.entries)} şarkı ({self.startup['search_index'] * 1000:.0f}ms)")
+
+    def local_match(self, query, network=False):
+        if query.startswith(("http://", "https://")):
+            return None
+        if network:
+            self.search_stats['forced'] += 1
+            return None
+        started = time.perf_counter()
+        entry = self.search.best(query)
+        if entry is None:
+            self.search_stats['network'] += 1
+            return None
+        self.search_stats['local'] += 1
+        logger.info(f"⚡ Yerel eşleşme ({(time.perf_counter() - started) * 1000:.1f}ms): {query} → {entry.title}")
+        return entry
+
+    def get_session(self, guild_id):
+        session = self.sessions.get(guild_id)
+        if session is None:
+            session = self.sessions[guild_id] = PlayerSession(self, guild_id)
+            logger.info(f"🎛 Oturum açıldı: {guild_id} ({len(self.sessions)} aktif)")
+        return session
+
+    def owner_session(self, create=True):
+        lookup = self.get_session if create else self.sessions.get
+        if not self.owner_id:
+            return None
+        fallback = None
+        for guild in self.guilds:
+            member = guild.get_member(int(self.owner_id))
+            if member is None:
+                continue
+            if member.voice:
+                self._owner_guild_id = guild.id
+                return lookup(guild.id)
+            if fallback is None:
+                fallback = guild.id
+        guild_id = self._owner_guild_id or fallback
+        return lookup(guild_id) if guild_id else None
+
+    async def close_session(self, guild_id):
+        session = self.sessions.pop(guild_id, None)
+        if session:
+            await session.close()
+            logger.info(f"💤 Oturum kapatıldı: {guild_id} ({len(self.sessions)} aktif)")
+            await self.update_presence()
+
+    async def session_reaper(self):
+        timeout = CONFIG.get('SESSION_IDLE_SECONDS', 300)
+        while not self.is_closed():
+            await asyncio.sleep(min(30, max(1, timeout)))
+            self.resolve_cache.save(force=False)
+            now = time.monotonic()
+            for guild_id, session in list(self.sessions.items()):
+                if session.is_busy():
+                    session.last_active = now
+                elif now - session.last_active >= timeout:
+                    try:
+                        await self.close_session(guild_id)
+                    except Exception as e:
+                        logger.error(f"Oturum kapatma hatası: {e}")
+
+    async def on_ready(self):
+        print(f"\n⚡ SİSTEM HAZIR: {self.user}\n")
+        if 'ready' not in self.startup:
+            self.startup['ready'] = time.perf_counter() - STARTED_AT
+            logger.info(
+                f"⏱ Açılış: kurulum {self.startup['constructed'] * 1000:.0f}ms, "
+                f"setup_hook {self.startup.get('setup_hook', 0) * 1000:.0f}ms, hazır {self.startup['ready'] * 1000:.0f}ms"
+            )
+        await self.update_presence()
+        if not self._cache_check_done:
+            self._cache_check_done = True
+            asyncio.create_task(self.check_favorites_cache())
+            asyncio.create_task(self.prefetch_loop())
+            asyncio.create_task(self.session_reaper())
+            asyncio.create_task(self.precache_loop())
+    
+    async def close(self):
+        for guild_id in list(self.sessions):
+            await self.close_session(guild_id)
+        if self.control:
+            await self.control.stop()
+        self.downloads.shutdown()
+        self.extractor.shutdown()
+        self.song_cache.save()
+        self.resolve_cache.save()
+        self.favorites.close()
+        self.history.close()
+        await super().close()
+
+    async def update_presence(self, status_text=None):
+        try:
+            if status_text is None:
+                playing = [s.current_title for s in self.sessions.values() if s.current_title != IDLE_TITLE]
+                if len(playing) > 1:
+                    status_text = f"{len(playing)} sunucuda müzik"
+                else:
+                    status_text = playing[0] if playing else IDLE_TITLE
+            if len(status_text) > 100:
+                status_text = status_text[:97] + "..."
+            await self.change_presence(
+                activity=discord.Activity(
+                    type=discord.ActivityType.listening,
+                    name=status_text
+                )
+            )
+        except Exception as e:
+            logger.error(f"Durum güncelleme hatası: {e}")
+
+    def track_gain(self, url):
+        if self.loudness_target is None:
+            return 1.0
+        lufs = self.song_cache.loudness(url)
+        if lufs is None:
+            return None
+        return loudness_gain(lufs, self.loudness_target)
+
+    async def measure_loudness(self, url, cache_path):
+        if url in self._loudness_jobs:
+            return None
+        self._loudness_jobs.add(url)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                FFMPEG_PATH, '-nostdin', '-hide_banner', '-i', cache_path, '-vn',
+                '-af', 'loudnorm=print_format=json', '-f', 'null', '-',
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            match = re.search(r'"input_i"\s*:\s*"([^"]+)"', stderr.decode(errors='ignore'))
+            lufs = float(match.group(1)) if match and process.returncode == 0 else None
+            title = (self.song_cache.get(url) or {}).get('title') or url
+            if lufs is None or not math.isfinite(lufs):
+                logger.warning(f"Ses yüksekliği ölçülemedi: {title}")
+                return None
+            if self.song_cache.set_loudness(url, lufs):
+                logger.info(f"🔊 Ses yüksekliği ölçüldü: {lufs:.1f} LUFS ({title})")
+            if cache_path.endswith('.opus'):
+                await self.normalize_cached(url, cache_path, lufs, title)
+            return lufs
+        except Exception as e:
+            logger.error(f"Ses yüksekliği ölçüm hatası: {e}")
+            return None
+        finally:
+            self._loudness_jobs.discard(url)
+
+    async def normalize_cached(self, url, cache_path, lufs, title):
+        if self.loudness_target is None:
+            return False
+        gain = loudness_gain(lufs, self.loudness_target)
+        if abs(gain - 1.0) < UNITY_TOLERANCE:
+            return False
+        gain_db = 20 * math.log10(gain)
+        tmp_path = cache_path + '.tmp.opus'
+        try:
+            process = await asyncio.create_subprocess_exec(
+                FFMPEG_PATH, '-nostdin', '-loglevel', 'error', '-y', '-i', cache_path, '-vn',
+                '-af', f'volume={gain_db:.2f}dB', '-c:a', 'libopus', '-b:a', '192k', tmp_path,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                logger.warning(f"Ses normalizasyonu başarısız: {stderr.decode(errors='ignore').strip()[:200]}")
+                return False
+            os.replace(tmp_path, cache_path)
+            self.song_cache.set_loudness(url, self.loudness_target, normalized=True)
+            logger.info(f"🎚 Cache dosyası {gain_db:+.1f}dB normalize edildi: {title}")
+            return True
+        except Exception as e:
+            logger.error(f"Ses normalizasyonu hatası: {e}")
+            return False
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def build_pcm(self, url, cache_path):
+        self._pcm_builds.add(url)
+        target = self.song_cache.pcm_path_for(url)
+        tmp_path = target + '.tmp'
+        try:
+            process = await asyncio.create_subprocess_exec(
+                FFMPEG_PATH, '-nostdin', '-loglevel', 'error', '-y', '-i', cache_path,
+                '-f', 's16le', '-ar', '48000', '-ac', '2', tmp_path,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                logger.warning(f"PCM dönüştürme başarısız: {stderr.decode(errors='ignore').strip()[:200]}")
+                return
+            os.replace(tmp_path, target)
+            if self.song_cache.add_pcm(url, target):
+                logger.info(f"⚡ PCM katmanına eklendi: {self.song_cache.get(url).get('title') or url}")
+        except Exception as e:
+            logger.error(f"PCM oluşturma hatası: {e}")
+        finally:
+            self._pcm_builds.discard(url)
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except Exception:
+                    pass
+
+    async def extract_info(self, query, urgent=False):
+        search_str = query if query.startswith(("http://", "https://")) else f"ytsearch1:{query}"
+        data = await self.extractor.extract(search_str, urgent=urgent)
+        if data and 'entries' in data:
+            if not data['entries'] or len(data['entries']) == 0:
+                logger.error("Arama sonuç bulunamadı!")
+                return None
+            data = data['entries'][0]
+        if not data or 'url' not in data:
+            logger.error("Geçersiz video verisi!")
+            return None
+        return data
+
+    async def resolve(self, query, urgent=False, horizon=0):
+        started = time.perf_counter()
+        entry = self.resolve_cache.get(query)
+        if entry and self.resolve_cache.stream_valid(entry, horizon=horizon):
+            self.resolve_cache.record('hit', time.perf_counter() - started)
+            self.log_resolve_stats('cache', started)
+            return self.resolve_cache.to_data(entry)
+        if entry and entry.get('webpage_url'):
+            data = await self.extract_info(entry['webpage_url'], urgent=urgent)
+            if data:
+                self.resolve_cache.update_stream(query, data)
+                self.resolve_cache.record('stream', time.perf_counter() - started)
+                self.log_resolve_stats('stream yenilendi', started)
+            return data
+        data = await self.extract_info(query, urgent=urgent)
+        if data:
+            self.resolve_cache.store(query, data)
+            self.search.add(data.get('webpage_url'), data.get('title'), HISTORY, data.get('duration', 0))
+            self.resolve_cache.record('miss', time.perf_counter() - started)
+            self.log_resolve_stats('yt-dlp', started)
+        return data
+
+    def log_resolve_stats(self, source, started):
+        stats = self.resolve_cache.stats()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"📦 Çözümleme ({source}): {elapsed_ms:.0f}ms | "
+            f"isabet {stats['hits']}, yenileme {stats['stream_refreshes']}, ıska {stats['misses']} | "
+            f"ort. cache {stats['avg_hit_ms']:.1f}ms vs yt-dlp {stats['avg_extract_ms']:.0f}ms"
+        )
+
+    async def refresh_if_expired(self, track, urgent=True, horizon=0):
+        if not track.expired(horizon=horizon) or not track.webpage_url:
+            return track
+        if not track.url:
+            logger.info(f"🔎 Liste öğesi çözümleniyor: {track.title}")
+            track.rehydrate(await self.resolve(track.webpage_url, urgent=urgent))
+            return track
+        kind = 'refreshes' if horizon == 0 else 'forced' if math.isinf(horizon) else 'background'
+        try:
+            refreshed = track.rehydrate(await self.resolve(track.webpage_url, urgent=urgent, horizon=horizon))
+        except Exception as e:
+            logger.error(f"Stream yenileme hatası: {e}")
+            refreshed = False
+        self.stream_stats[kind if refreshed else 'failures'] += 1
+        stats = self.stream_stats
+        logger.info(
+            f"🔄 Stream URL {'yenilendi' if refreshed else 'YENİLENEMEDİ'}: {track.title} | "
+            f"zamanında {stats['refreshes']}, arka plan {stats['background']}, zorunlu {stats['forced']}, "
+            f"kurtarma {stats['recoveries']}, hata {stats['failures']}"
+        )
+        return track
+
+    async def prefetch_loop(self):
+        while not self.is_closed():
+            await asyncio.sleep(0.5)
+            for guild_id, session in list(self.sessions.items()):
+                task = self._prefetch_tasks.get(guild_id)
+                if task is None or task.done():
+                    self._prefetch_tasks[guild_id] = asyncio.create_task(self._prefetch_tick(session))
+            for guild_id in [g for g in self._prefetch_tasks if g not in self.sessions]:
+                self._prefetch_tasks.pop(guild_id)
+
+    async def _prefetch_tick(self, session):
+        try:
+            await session.maybe_prefetch()
+        except Exception as e:
+            logger.error(f"Ön yükleme hatası: {e}")
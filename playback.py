@@ -0,0 +1,247 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+
+from audio import MixerSource, summarize
+
+logger = logging.getLogger('MusicBot')
+
+IDLE = 'idle'
+LOADING = 'loading'
+PLAYING = 'playing'
+PAUSED = 'paused'
+SPEAKING = 'speaking'
+
+START_TIMEOUT = 2.0
+
+
+class PlaybackController:
+    def __init__(self, session, owner_id=''):
+        self.session = session
+        self.owner_id = owner_id
+        self.state = IDLE
+        self.mixer = None
+        self.parked = False
+        self.generation = 0
+        self.tickets = 0
+        self._lock = None
+        self.latencies = defaultdict(lambda: deque(maxlen=200))
+
+    @property
+    def voice_client(self):
+        return self.session.voice_client
+
+    def _command_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def set_state(self, state):
+        if state != self.state:
+            logger.debug(f"Oynatma durumu: {self.state} → {state}")
+            self.state = state
+
+    def record(self, name, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.latencies[name].append(elapsed_ms)
+        logger.info(f"⏱ {name}: {elapsed_ms:.0f}ms")
+
+    async def run(self, name, func, *args, **kwargs):
+        started = time.perf_counter()
+        async with self._command_lock():
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.record(name, started)
+
+    def claim(self):
+        self.tickets += 1
+        return self.tickets
+
+    def is_current(self, ticket):
+        return ticket == self.tickets
+
+    async def ensure_voice(self):
+        if self.voice_client and self.voice_client.is_connected():
+            return True
+        if not self.owner_id:
+            logger.error("OWNER_ID config'de tanımlı değil!")
+            return False
+        logger.info("Bot bağlı değil, otomatik katılıyor...")
+        channel_name = await self.session.join_user_channel(self.owner_id)
+        if not channel_name:
+            logger.error("Kullanıcı ses kanalında değil!")
+            return False
+        return True
+
+    def ensure_mixer(self):
+        vc = self.voice_client
+        attached = vc.source is self.mixer and (vc.is_playing() or vc.is_paused())
+        if self.mixer is None or not attached:
+            if vc.is_playing() or vc.is_paused():
+                vc.stop()
+            config = self.session.config
+            self.mixer = MixerSource(
+                volume=self.session.volume,
+                loudness_target=self.session.loudness_target,
+                duck_db=config.get('DUCK_DB', -12.0),
+                attack_ms=config.get('DUCK_ATTACK_MS', 80),
+                release_ms=config.get('DUCK_RELEASE_MS', 400)
+            )
+            vc.play(self.mixer, after=self._on_mixer_detached)
+            logger.info("🎚 Mikser ses bağlantısına bağlandı")
+        return self.mixer
+
+    def _on_mixer_detached(self, error):
+        if error:
+            logger.error(f"Mikser hatası: {error}")
+        self.set_state(IDLE)
+        self.session.discard_prefetched()
+
+    def _park(self):
+        mixer = self.mixer
+        if mixer is None or mixer.is_active() or mixer.is_speaking():
+            return
+        if self.voice_client and self.voice_client.is_playing() and self.voice_client.source is mixer:
+            self.voice_client.pause()
+            self.parked = True
+            logger.debug("Mikser boşta, ses bağlantısı duraklatıldı")
+
+    def current_source(self):
+        return self.mixer.current if self.mixer else None
+
+    def is_playing(self):
+        return bool(self.voice_client and self.voice_client.is_playing() and self.mixer and self.mixer.is_active() and not self.mixer.held)
+
+    def is_paused(self):
+        held = self.mixer is not None and self.mixer.held
+        return bool(self.voice_client and (self.voice_client.is_paused() or held) and self.mixer and self.mixer.is_active())
+
+    def is_speaking(self):
+        return bool(self.mixer and self.mixer.is_speaking())
+
+    async def start(self, source, on_end=None, fade_ms=0, state=PLAYING, start_sec=0, restart=False, gain=None, telemetry=None):
+        mixer = self.ensure_mixer()
+        if restart and telemetry is None:
+            telemetry = mixer.telemetry
+        self.generation += 1
+        generation = self.generation
+        loop = asyncio.get_running_loop()
+        first_frame = loop.create_future()
+
+        def on_start():
+            loop.call_soon_threadsafe(lambda: first_frame.done() or first_frame.set_result(True))
+
+        def after(error):
+            if error:
+                logger.error(f"HATA: {error}")
+            if generation != self.generation:
+                return
+            handler = on_end or self.session.advance
+            asyncio.run_coroutine_threadsafe(self.run('advance', self._finished, generation, handler), self.session.loop)
+
+        mixer.play(source, after=after, fade_ms=fade_ms, on_start=on_start, start_sec=start_sec, telemetry=telemetry, gain=gain)
+        mixer.held = False
+        self.parked = False
+        if self.voice_client.is_paused():
+            self.voice_client.resume()
+        self.set_state(state)
+        try:
+            await asyncio.wait_for(first_frame, START_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning("İlk ses karesi zamanında gelmedi")
+        return generation
+
+    def speak(self, source, on_end=None):
+        mixer = self.ensure_mixer()
+        loop = asyncio.get_running_loop()
+        first_audio = loop.create_future()
+
+        def on_start():
+            loop.call_soon_threadsafe(lambda: first_audio.done() or first_audio.set_result(True))
+
+        def after(error):
+            if error:
+                logger.error(f"HATA: {error}")
+            asyncio.run_coroutine_threadsafe(self._spoken(on_end), self.session.loop)
+
+        if self.parked:
+            self.parked = False
+            self.voice_client.resume()
+        elif self.voice_client.is_paused():
+            mixer.held = True
+            self.voice_client.resume()
+        if not mixer.is_active():
+            self.set_state(SPEAKING)
+        position = mixer.add_overlay(source, after=after, on_start=on_start)
+        return first_audio, position
+
+    async def _spoken(self, on_end):
+        if on_end:
+            await on_end()
+        mixer = self.mixer
+        if mixer is None or mixer.is_speaking():
+            return
+        if mixer.held:
+            mixer.held = False
+            if self.voice_client and self.voice_client.is_playing():
+                self.voice_client.pause()
+        if self.state == SPEAKING:
+            self.set_state(IDLE)
+        self._park()
+
+    async def _finished(self, generation, handler):
+        if generation != self.generation:
+            return
+        await handler()
+        self._park()
+
+    async def stop(self):
+        self.generation += 1
+        self.session.discard_prefetched()
+        if self.mixer:
+            self.mixer.stop()
+            self._park()
+        self.set_state(IDLE)
+
+    def pause(self):
+        started = time.perf_counter()
+        if self.is_playing():
+            self.voice_client.pause()
+            self.set_state(PAUSED)
+            self.record('pause', started)
+            return True
+        return False
+
+    def resume(self):
+        started = time.perf_counter()
+        if self.is_paused():
+            self.mixer.held = False
+            self.voice_client.resume()
+            self.set_state(PLAYING)
+            self.record('resume', started)
+            return True
+        return False
+
+    def seek(self, seconds):
+        return bool(self.mixer and self.mixer.seek(seconds))
+
+    def position(self):
+        return self.mixer.position() if self.mixer else None
+
+    def telemetry(self):
+        telemetry = self.mixer.telemetry if self.mixer else None
+        return telemetry.summary() if telemetry is not None else None
+
+    def set_volume(self, volume):
+        if self.mixer:
+            self.mixer.volume = volume
+
+    def stats(self):
+        result = {}
+        for name, samples in self.latencies.items():
+            summary = summarize(samples)
+            if summary:
+                result[name] = summary
+        return result
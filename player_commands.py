@@ -0,0 +1,97 @@
+import logging
+
+from discord.ext import commands
+
+logger = logging.getLogger('MusicBot')
+
+
+class PlayerCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_check(self, ctx):
+        return ctx.guild is not None
+
+    async def _joined_session(self, ctx):
+        voice = getattr(ctx.author, 'voice', None)
+        if not voice or not voice.channel:
+            await ctx.reply("Önce bir ses kanalına katılmalısın.")
+            return None
+        session = self.bot.get_session(ctx.guild.id)
+        await session.connect(voice.channel)
+        return session
+
+    @commands.command(name='play', aliases=['p', 'çal'])
+    async def play(self, ctx, *, query):
+        session = await self._joined_session(ctx)
+        if not session:
+            return
+        async with ctx.typing():
+            title = await session.play_music(query)
+        await ctx.reply(f"▶ {title}" if title else "Sonuç bulunamadı.")
+
+    @commands.command(name='yt', aliases=['web', 'ara'])
+    async def play_network(self, ctx, *, query):
+        session = await self._joined_session(ctx)
+        if not session:
+            return
+        async with ctx.typing():
+            title = await session.play_music(query, network=True)
+        await ctx.reply(f"▶ {title}" if title else "Sonuç bulunamadı.")
+
+    @commands.command(name='queue', aliases=['q', 'sıra'])
+    async def queue(self, ctx, *, query=None):
+        if query:
+            session = await self._joined_session(ctx)
+            if not session:
+                return
+            result = await session.add_to_queue(query)
+            await ctx.reply(result or "Sıraya eklenemedi.")
+            return
+        session = self.bot.sessions.get(ctx.guild.id)
+        if not session or not session.queue:
+            await ctx.reply("Sıra boş.")
+            return
+        lines = [f"{i}. {track.title[:60]}" for i, track in enumerate(session.queue[:10], 1)]
+        if len(session.queue) > 10:
+            lines.append(f"... ve {len(session.queue) - 10} şarkı daha")
+        await ctx.reply("\n".join(lines))
+
+    @commands.command(name='skip', aliases=['s', 'geç'])
+    async def skip(self, ctx):
+        session = self.bot.sessions.get(ctx.guild.id)
+        if session:
+            await session.skip_track()
+
+    @commands.command(name='pause', aliases=['duraklat'])
+    async def pause(self, ctx):
+        session = self.bot.sessions.get(ctx.guild.id)
+        if session:
+            session.pause_music()
+
+    @commands.command(name='resume', aliases=['devam'])
+    async def resume(self, ctx):
+        session = self.bot.sessions.get(ctx.guild.id)
+        if session:
+            session.resume_music()
+
+    @commands.command(name='stop', aliases=['dur'])
+    async def stop(self, ctx):
+        session = self.bot.sessions.get(ctx.guild.id)
+        if session:
+            session.clear_queue()
+            await session.stop_music()
+
+    @commands.command(name='leave', aliases=['ayrıl'])
+    async def leave(self, ctx):
+        await self.bot.close_session(ctx.guild.id)
+
+    @commands.command(name='np', aliases=['şimdi'])
+    async def now_playing(self, ctx):
+        session = self.bot.sessions.get(ctx.guild.id)
+        if not session or not session.current_url and not session.current_track:
+            await ctx.reply("Şu an bir şey çalmıyor.")
+            return
+        e_m, e_s = divmod(session.get_elapsed_time(), 60)
+        t_m, t_s = divmod(int(session.duration), 60)
+        await ctx.reply(f"♪ {session.current_title} [{e_m:02d}:{e_s:02d} / {t_m:02d}:{t_s:02d}]")
@@ -0,0 +1,205 @@
+import json
+import time
+import logging
+import threading
+from urllib.parse import urlparse, parse_qs
+
+from storage import write_json
+
+logger = logging.getLogger('MusicBot')
+
+STABLE_FIELDS = ('id', 'title', 'duration', 'webpage_url', 'extractor_key', 'format_id', 'acodec', 'ext', 'abr')
+DEFAULT_STREAM_TTL = 5 * 60 * 60
+EXTRACTOR_STREAM_TTL = {'Youtube': 6 * 60 * 60, 'Soundcloud': 30 * 60, 'Vimeo': 60 * 60}
+EXPIRY_PARAMS = ('expire', 'expires', 'exp')
+STREAM_SAFETY_MARGIN = 10 * 60
+SAVE_INTERVAL = 30
+
+
+def normalize_query(query):
+    query = query.strip()
+    if not query.startswith(("http://", "https://")):
+        return "search:" + " ".join(query.lower().split())
+    parsed = urlparse(query)
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith("m."):
+        host = host[2:]
+    if host == "youtu.be":
+        video_id = parsed.path.lstrip('/').split('/')[0]
+        if video_id:
+            return f"youtube:{video_id}"
+    if host in ("youtube.com", "music.youtube.com"):
+        params = parse_qs(parsed.query)
+        if params.get('v'):
+            return f"youtube:{params['v'][0]}"
+        parts = parsed.path.strip('/').split('/')
+        if len(parts) >= 2 and parts[0] in ('shorts', 'live', 'embed'):
+            return f"youtube:{parts[1]}"
+    return f"url:{host}{parsed.path.rstrip('/')}"
+
+
+def is_playlist(query):
+    if not query.startswith(("http://", "https://")):
+        return False
+    parsed = urlparse(query.strip())
+    params = parse_qs(parsed.query)
+    if parsed.path.rstrip('/').endswith('/playlist'):
+        return bool(params.get('list'))
+    return bool(params.get('list')) and not params.get('v')
+
+
+def stream_expiry(stream_url, now=None, extractor=None):
+    now = now or time.time()
+    try:
+        params = {k.lower(): v for k, v in parse_qs(urlparse(stream_url).query).items()}
+        for name in EXPIRY_PARAMS:
+            if params.get(name) and float(params[name][0]) > 1e9:
+                return float(params[name][0])
+    except Exception:
+        pass
+    return now + EXTRACTOR_STREAM_TTL.get(extractor, DEFAULT_STREAM_TTL)
+
+
+class ResolutionCache:
+    def __init__(self, path='resolve_cache.json', ttl=7 * 24 * 60 * 60, max_entries=2000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.aliases = {}
+        self.hits = 0
+        self.stream_hits = 0
+        self.misses = 0
+        self.lookup_time = 0.0
+        self.extract_time = 0.0
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            self.entries = raw.get('entries', {})
+            self.aliases = raw.get('aliases', {})
+            self.prune()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Çözümleme cache okuma hatası: {e}")
+
+    def save(self, force=True):
+        try:
+            with self._lock:
+                if not force and (not self._dirty or time.time() - self._last_save < SAVE_INTERVAL):
+                    return
+                write_json(self.path, {'entries': self.entries, 'aliases': self.aliases})
+                self._dirty = False
+                self._last_save = time.time()
+        except Exception as e:
+            logger.error(f"Çözümleme cache kaydetme hatası: {e}")
+
+    def prune(self):
+        now = time.time()
+        with self._lock:
+            expired = [k for k, v in self.entries.items() if now - v.get('resolved_at', 0) > self.ttl]
+            for key in expired:
+                del self.entries[key]
+            if len(self.entries) > self.max_entries:
+                oldest = sorted(self.entries, key=lambda k: self.entries[k].get('used_at', 0))
+                for key in oldest[:len(self.entries) - self.max_entries]:
+                    del self.entries[key]
+            self.aliases = {a: k for a, k in self.aliases.items() if k in self.entries}
+
+    def _key_for(self, query):
+        key = normalize_query(query)
+        return self.aliases.get(key, key)
+
+    def get(self, query):
+        key = self._key_for(query)
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        if time.time() - entry.get('resolved_at', 0) > self.ttl:
+            with self._lock:
+                self.entries.pop(key, None)
+            return None
+        entry['used_at'] = time.time()
+        return entry
+
+    def stream_valid(self, entry, now=None, horizon=0):
+        stream = entry.get('stream') if entry else None
+        if not stream or not stream.get('url'):
+            return False
+        now = now or time.time()
+        return stream.get('expires_at', 0) - STREAM_SAFETY_MARGIN - horizon > now
+
+    def to_data(self, entry):
+        data = {k: entry.get(k) for k in STABLE_FIELDS if entry.get(k) is not None}
+        stream = entry.get('stream') or {}
+        data['url'] = stream.get('url')
+        data['http_headers'] = stream.get('http_headers', {})
+        return data
+
+    def store(self, query, data):
+        if not data or not data.get('url'):
+            return
+        now = time.time()
+        page_url = data.get('webpage_url') or query
+        key = normalize_query(page_url)
+        entry = {k: data.get(k) for k in STABLE_FIELDS if data.get(k) is not None}
+        entry['resolved_at'] = now
+        entry['used_at'] = now
+        entry['stream'] = {
+            'url': data['url'],
+            'http_headers': data.get('http_headers', {}),
+            'expires_at': stream_expiry(data['url'], now, data.get('extractor_key'))
+        }
+        with self._lock:
+            self.entries[key] = entry
+            query_key = normalize_query(query)
+            if query_key != key:
+                self.aliases[query_key] = key
+            self._dirty = True
+        if len(self.entries) > self.max_entries:
+            self.prune()
+        self.save(force=False)
+
+    def update_stream(self, query, data):
+        entry = self.get(query)
+        if not entry or not data or not data.get('url'):
+            return self.store(query, data)
+        entry['stream'] = {
+            'url': data['url'],
+            'http_headers': data.get('http_headers', {}),
+            'expires_at': stream_expiry(data['url'], extractor=data.get('extractor_key') or entry.get('extractor_key'))
+        }
+        self._dirty = True
+        self.save(force=False)
+
+    def record(self, kind, elapsed):
+        if kind == 'hit':
+            self.hits += 1
+            self.lookup_time += elapsed
+        elif kind == 'stream':
+            self.stream_hits += 1
+            self.extract_time += elapsed
+        else:
+            self.misses += 1
+            self.extract_time += elapsed
+
+    def stats(self):
+        lookups = self.hits + self.stream_hits + self.misses
+        extracts = self.stream_hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'stream_refreshes': self.stream_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'avg_hit_ms': (self.lookup_time / self.hits * 1000) if self.hits else 0.0,
+            'avg_extract_ms': (self.extract_time / extracts * 1000) if extracts else 0.0
+        }
@@ -0,0 +1,193 @@
+import math
+import heapq
+import threading
+import unicodedata
+from functools import lru_cache
+
+from resolve_cache import normalize_query
+
+FAVORITE = 'favorite'
+CACHE = 'cache'
+HISTORY = 'history'
+SOURCE_BOOST = {FAVORITE: 0.15, CACHE: 0.1, HISTORY: 0.05}
+TURKISH_FOLD = str.maketrans({'ı': 'i', 'İ': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u'})
+FUZZY_MIN = 0.5
+SIMILARITY_MIN = 0.3
+AUTO_PLAY_SCORE = 0.75
+MAX_CANDIDATES = 120
+
+
+def fold(text):
+    text = unicodedata.normalize('NFKD', (text or '').translate(TURKISH_FOLD).casefold())
+    return "".join(c if c.isalnum() else ' ' for c in text if not unicodedata.combining(c))
+
+
+def terms(text):
+    return fold(text).split()
+
+
+@lru_cache(maxsize=65536)
+def grams(term, complete=True):
+    padded = f"  {term} " if complete else f"  {term}"
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class SearchEntry:
+    __slots__ = ('key', 'url', 'title', 'duration', 'terms', 'sources')
+
+    def __init__(self, key, url, title, duration=0):
+        self.key = key
+        self.url = url
+        self.title = title
+        self.duration = duration
+        self.terms = tuple(dict.fromkeys(terms(title)))
+        self.sources = set()
+
+    def grams(self):
+        return set().union(*(grams(t) for t in self.terms)) if self.terms else set()
+
+    def to_dict(self, score=None):
+        data = {'title': self.title, 'url': self.url, 'duration': self.duration, 'sources': sorted(self.sources)}
+        if score is not None:
+            data['score'] = round(score, 3)
+        return data
+
+
+class SearchIndex:
+    def __init__(self):
+        self.entries = {}
+        self._grams = {}
+        self._lock = threading.RLock()
+
+    def add(self, url, title, source, duration=0):
+        if not url or not title or not url.startswith(("http://", "https://")):
+            return None
+        key = normalize_query(url)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = self.entries[key] = SearchEntry(key, url, title, duration)
+                self._index(entry)
+            elif source == FAVORITE and entry.title != title:
+                self._retitle(entry, title)
+            entry.sources.add(source)
+            if duration and not entry.duration:
+                entry.duration = duration
+            return entry
+
+    def discard(self, url, source):
+        key = normalize_query(url) if url else None
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+            entry.sources.discard(source)
+            if not entry.sources:
+                self._unindex(entry)
+                del self.entries[key]
+            return True
+
+    def rename(self, url, title):
+        with self._lock:
+            entry = self.entries.get(normalize_query(url)) if url and title else None
+            if entry is None:
+                return False
+            self._retitle(entry, title)
+            return True
+
+    def _retitle(self, entry, title):
+        self._unindex(entry)
+        entry.title = title
+        entry.terms = tuple(dict.fromkeys(terms(title)))
+        self._index(entry)
+
+    def _index(self, entry):
+        for gram in entry.grams():
+            self._grams.setdefault(gram, set()).add(entry.key)
+
+    def _unindex(self, entry):
+        for gram in entry.grams():
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(entry.key)
+                if not keys:
+                    del self._grams[gram]
+
+    def _prefix(self, term):
+        postings = sorted((self._grams.get(g, ()) for g in grams(term, complete=False)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        return set(postings[0]).intersection(*postings[1:])
+
+    def _fuzzy(self, term):
+        postings = sorted((self._grams.get(g, ()) for g in grams(term)), key=len)
+        spare = len(postings) - math.ceil(len(postings) * FUZZY_MIN) + 1
+        return set().union(*postings[:spare])
+
+    def _term_score(self, term, entry):
+        if term in entry.terms:
+            return 1.0
+        best = 0.0
+        wanted = grams(term)
+        for candidate in entry.terms:
+            if candidate.startswith(term):
+                best = max(best, 0.6 + 0.4 * len(term) / len(candidate))
+            elif best < 0.6:
+                other = grams(candidate)
+                similarity = len(wanted & other) / len(wanted | other)
+                if similarity >= SIMILARITY_MIN:
+                    best = max(best, 0.8 * similarity)
+        return best
+
+    def _prerank(self, query_terms, entry):
+        exact = sum(1 for term in query_terms if term in entry.terms)
+        boost = max((SOURCE_BOOST.get(s, 0) for s in entry.sources), default=0)
+        return -exact, len(entry.terms), -boost
+
+    def _score(self, query_terms, entry):
+        scores = [self._term_score(term, entry) for term in query_terms]
+        matched = sum(1 for score in scores if score)
+        base = sum(scores) / len(query_terms)
+        boost = max((SOURCE_BOOST.get(s, 0) for s in entry.sources), default=0)
+        rank = base + boost - 0.01 * max(len(entry.terms) - matched, 0)
+        return rank, base, matched == len(query_terms)
+
+    def search(self, query, limit=8):
+        query_terms = list(dict.fromkeys(terms(query)))
+        if not query_terms or query.strip().startswith(("http://", "https://")):
+            return []
+        with self._lock:
+            candidates = None
+            for term in query_terms:
+                found = self._prefix(term)
+                if len(term) >= 4 and len(found) < limit:
+                    found |= self._fuzzy(term)
+                candidates = found if candidates is None else candidates & found
+                if not candidates:
+                    break
+            if not candidates:
+                candidates = set().union(*(self._fuzzy(t) for t in query_terms if len(t) >= 3))
+            if len(candidates) > MAX_CANDIDATES:
+                candidates = heapq.nsmallest(MAX_CANDIDATES, candidates, key=lambda key: self._prerank(query_terms, self.entries[key]))
+            scored = []
+            for key in candidates:
+                entry = self.entries[key]
+                rank, base, complete = self._score(query_terms, entry)
+                if base > 0:
+                    scored.append((complete, rank, base, entry))
+            top = heapq.nlargest(limit, scored, key=lambda item: item[:2])
+            return [(entry, base, complete) for complete, _, base, entry in top]
+
+    def best(self, query):
+        results = self.search(query, limit=1)
+        if results and results[0][2] and results[0][1] >= AUTO_PLAY_SCORE:
+            return results[0][0]
+        return None
+
+    def stats(self):
+        with self._lock:
+            counts = {FAVORITE: 0, CACHE: 0, HISTORY: 0}
+            for entry in self.entries.values():
+                for source in entry.sources:
+                    counts[source] += 1
+            return {'entries': len(self.entries), 'grams': len(self._grams), **counts}
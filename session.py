@@ -0,0 +1,599 @@
+import os
+import math
+import time
+import asyncio
+import logging
+
+import discord
+
+from audio import PrefetchedSource, MmapPCMSource, FFmpegErrorLog
+from playback import PlaybackController, IDLE
+from downloads import PRIORITY_NEXT
+from state_feed import ChangeFeed, INSERT, REMOVE, RESET, SET
+from resolve_cache import is_playlist
+from tracks import Track
+from tts_cache import TTSStream, choose_voice, DEFAULT_RATE, DEFAULT_PITCH
+
+logger = logging.getLogger('MusicBot')
+
+IDLE_TITLE = "Beklemede..."
+MAX_STREAM_RECOVERIES = 3
+FFMPEG_OPTIONS = {'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5', 'options': '-vn'}
+
+
+class PlayerSession:
+    def __init__(self, bot, guild_id):
+        self.bot = bot
+        self.guild_id = guild_id
+        self.config = bot.config
+        self.ffmpeg_path = bot.config['FFMPEG_PATH']
+        self.song_cache = bot.song_cache
+        self.voice_client = None
+        self.loop_mode = False
+        self.current_url = None
+        self.current_title = IDLE_TITLE
+        self.volume = 1.0
+        self.duration = 0
+        self.start_offset = 0
+        self.queue = []
+        self.current_track = None
+        self._loop_track = None
+        self._crossfade_generation = None
+        self.is_playing_from_cache = False
+        self.prefetched = None
+        self.imports = set()
+        self._resolving = None
+        self.stream_log = None
+        self.stream_clock = None
+        self._recoveries = 0
+        self.last_active = time.monotonic()
+        self.feed = ChangeFeed()
+        self.playback = PlaybackController(self, owner_id=bot.config.get('OWNER_ID', ''))
+
+    @property
+    def loop(self):
+        return self.bot.loop
+
+    @property
+    def loudness_target(self):
+        return self.bot.loudness_target
+
+    @property
+    def guild(self):
+        return self.bot.get_guild(self.guild_id)
+
+    def enqueue(self, track):
+        with self.feed.lock:
+            self.queue.append(track)
+            self.feed.publish('queue', INSERT, len(self.queue) - 1, track)
+        return len(self.queue)
+
+    def dequeue(self):
+        with self.feed.lock:
+            if not self.queue:
+                return None
+            track = self.queue.pop(0)
+            self.feed.publish('queue', REMOVE, 0)
+        return track
+
+    def discard(self, track):
+        with self.feed.lock:
+            for index, item in enumerate(self.queue):
+                if item is track:
+                    del self.queue[index]
+                    self.feed.publish('queue', REMOVE, index)
+                    return True
+        return False
+
+    def clear_queue(self):
+        for task in list(self.imports):
+            task.cancel()
+        with self.feed.lock:
+            self.queue.clear()
+            self.feed.publish('queue', RESET, value=[])
+
+    def publish_now_playing(self):
+        self.feed.publish('now_playing', SET, value={'title': self.current_title, 'duration': self.duration})
+
+    def is_busy(self):
+        return self.playback.state != IDLE or self.playback.is_playing() or self.playback.is_paused() or self.playback.is_speaking()
+
+    async def close(self):
+        await self.playback.stop()
+        self.clear_queue()
+        self.current_url = None
+        self.current_track = None
+        if self.voice_client and self.voice_client.is_connected():
+            try:
+                await self.voice_client.disconnect()
+            except Exception as e:
+                logger.error(f"Ses bağlantısı kapatma hatası: {e}")
+        self.voice_client = None
+
+    async def join_user_channel(self, user_id):
+        if not self.bot.is_ready():
+            await self.bot.wait_until_ready()
+        guild = self.guild
+        member = guild.get_member(int(user_id)) if guild else None
+        if not member or not member.voice:
+            return None
+        return await self.connect(member.voice.channel)
+
+    async def connect(self, channel):
+        if self.voice_client is None and channel.guild.voice_client:
+            self.voice_client = channel.guild.voice_client
+        if self.voice_client and self.voice_client.is_connected():
+            if self.voice_client.channel != channel:
+                await self.voice_client.move_to(channel)
+        else:
+            self.voice_client = await channel.connect()
+        self.last_active = time.monotonic()
+        return channel.name
+
+    async def play_from_cache(self, url, title, duration, start_sec=0, restart=False):
+        ticket = self.playback.claim()
+        try:
+            cache_path = self.song_cache.lookup(url)
+            if not cache_path or not os.path.exists(cache_path):
+                logger.warning(f"Cache dosyası bulunamadı, stream'e geçiliyor")
+                self.song_cache.remove(url)
+                return await self.play_music(url, start_sec)
+            if not await self.playback.ensure_voice():
+                return None
+            if not self.playback.is_current(ticket):
+                return None
+            result = await self.playback.run('play_cache', self._play_cached, cache_path, url, title, duration, start_sec, restart)
+            await self.bot.update_presence()
+            return result
+        except Exception as e:
+            logger.error(f"Cache oynatma hatası: {e}")
+            self.is_playing_from_cache = False
+            return None
+
+    async def _play_cached(self, cache_path, url, title, duration, start_sec=0, restart=False, source=None, fade_ms=0):
+        self.current_title = title
+        self.current_url = url
+        self.duration = duration
+        self.start_offset = start_sec
+        self.current_track = None
+        self.stream_log = None
+        self.is_playing_from_cache = True
+        self.publish_now_playing()
+        logger.info(f"Cache'den oynatılıyor: {title} (başlangıç: {start_sec}s)")
+        if not restart:
+            self.bot.record_play(url, title, duration, cached=True)
+        if source is None:
+            source = self._cached_source(cache_path, start_sec, url)
+        await self.playback.start(source, fade_ms=fade_ms, start_sec=start_sec, restart=restart, gain=self.bot.track_gain(url))
+        if self.song_cache.wants_pcm(url) and url not in self.bot._pcm_builds:
+            asyncio.create_task(self.bot.build_pcm(url, cache_path))
+        if self.song_cache.loudness(url) is None and url not in self.bot._loudness_jobs:
+            asyncio.create_task(self.bot.measure_loudness(url, cache_path))
+        return title
+
+    def _cached_source(self, cache_path, start_sec=0, url=None):
+        pcm_path = self.song_cache.pcm_lookup(url) if url else None
+        if pcm_path:
+            try:
+                return MmapPCMSource(pcm_path, start_sec)
+            except Exception as e:
+                logger.warning(f"PCM dosyası açılamadı, sıkıştırılmış dosyaya dönülüyor: {e}")
+        before_args = f'-ss {start_sec}' if start_sec > 0 else None
+        if cache_path.endswith('.opus'):
+            return discord.FFmpegOpusAudio(cache_path, executable=self.ffmpeg_path, codec='copy', before_options=before_args, options=FFMPEG_OPTIONS['options'])
+        if before_args:
+            return discord.FFmpegPCMAudio(cache_path, executable=self.ffmpeg_path, before_options=before_args, options=FFMPEG_OPTIONS['options'])
+        return discord.FFmpegPCMAudio(cache_path, executable=self.ffmpeg_path, options=FFMPEG_OPTIONS['options'])
+
+    def _stream_source(self, track, start_sec=0):
+        before_args = FFMPEG_OPTIONS['before_options'] + f' -headers "{track.header_block()}" -ss {start_sec}'
+        error_log = FFmpegErrorLog()
+        source = discord.FFmpegPCMAudio(track.url, executable=self.ffmpeg_path, before_options=before_args, options=FFMPEG_OPTIONS['options'], stderr=error_log)
+        source.error_log = error_log
+        return source
+
+    def _watch_stream(self, source):
+        self.stream_log = getattr(source, 'error_log', None)
+        self.stream_clock = self.playback.mixer.telemetry if self.playback.mixer else None
+
+    async def _recover_stream(self):
+        log, clock, track = self.stream_log, self.stream_clock, self.current_track
+        if log is None or log.status is None or self.is_playing_from_cache or track is None:
+            return False
+        self.stream_log = None
+        position = clock.position() if clock is not None else self.start_offset
+        if self.duration and position >= self.duration - 2:
+            return False
+        if self._recoveries >= MAX_STREAM_RECOVERIES:
+            logger.error(f"Stream kurtarılamadı ({self._recoveries} deneme): {track.title}")
+            self.bot.stream_stats['failures'] += 1
+            return False
+        self._recoveries += 1
+        logger.warning(f"⚠️ Stream {position:.0f}s konumunda HTTP {log.status} ile kesildi, yeniden çözümleniyor: {track.title}")
+        await self.bot.refresh_if_expired(track, horizon=math.inf)
+        if track.expired():
+            return False
+        self.discard_prefetched()
+        source = self._stream_source(track, position)
+        await self.playback.start(source, start_sec=position, telemetry=clock)
+        self._watch_stream(source)
+        self.start_offset = position
+        self.bot.stream_stats['recoveries'] += 1
+        return True
+
+    async def seek(self, target_sec):
+        source = self.playback.current_source()
+        if source is not None and getattr(source, 'seekable', False):
+            return await self.playback.run('seek', self._seek_in_place, source, target_sec)
+        if self.is_playing_from_cache and self.bot.is_cached(self.current_url):
+            return await self.play_from_cache(self.current_url, self.current_title, self.duration, start_sec=target_sec, restart=True)
+        if self.current_track and not self.is_playing_from_cache:
+            ticket = self.playback.claim()
+            return await self.playback.run('seek', self._seek_stream, ticket, self.current_track, target_sec)
+        return await self.play_music(self.current_url, start_sec=target_sec)
+
+    async def _seek_stream(self, ticket, track, target_sec):
+        if not self.playback.is_current(ticket):
+            return None
+        await self.bot.refresh_if_expired(track)
+        if not self.playback.is_current(ticket) or track is not self.current_track:
+            return None
+        logger.info(f"⏩ Stream {target_sec}s konumuna atlanıyor: {self.current_title}")
+        source = self._stream_source(track, target_sec)
+        await self.playback.start(source, start_sec=target_sec, restart=True)
+        self._watch_stream(source)
+        self.start_offset = target_sec
+        return self.current_title
+
+    async def _seek_in_place(self, source, target_sec):
+        if source is not self.playback.current_source() or not self.playback.seek(target_sec):
+            return None
+        self.start_offset = target_sec
+        return self.current_title
+
+    async def stop_music(self):
+        await self.playback.run('stop', self.playback.stop)
+        self.current_url = None
+
+    async def play_music(self, query, start_sec=0, network=False):
+        if is_playlist(query):
+            return await self.play_playlist(query)
+        match = self.bot.local_match(query, network)
+        if match:
+            query = match.url
+        if self.song_cache.has(query):
+            entry = self.song_cache.get(query)
+            return await self.play_from_cache(query, entry.get('title') or query, entry.get('duration', 0), start_sec)
+        ticket = self.playback.claim()
+        if not await self.playback.ensure_voice():
+            return None
+        try:
+            logger.info(f"Yükleniyor: {query}")
+            info = await self.bot.resolve(query, urgent=True)
+            if not info:
+                return None
+            track = Track.from_info(info)
+            page_url = track.webpage_url
+            if page_url and self.song_cache.has(page_url) and self.playback.is_current(ticket):
+                entry = self.song_cache.get(page_url)
+                return await self.play_from_cache(page_url, entry.get('title') or track.title, entry.get('duration') or track.duration, start_sec)
+            if not self.playback.is_current(ticket):
+                logger.info(f"Daha yeni bir istek geldi, atlanıyor: {query}")
+                return None
+            return await self.playback.run('play', self._play_url, track, start_sec)
+        except Exception as e:
+            logger.error(f"HATA: {e}")
+            return None
+
+    async def _open_playlist(self, url):
+        stream = self.bot.extractor.playlist(url, limit=self.config.get('PLAYLIST_LIMIT', 1000))
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            logger.error(f"Çalma listesi boş: {url}")
+            return None
+        except Exception as e:
+            logger.error(f"Çalma listesi okunamadı: {e}")
+            await stream.aclose()
+            return None
+        task = asyncio.create_task(self._import_playlist(stream, first))
+        self.imports.add(task)
+        task.add_done_callback(self.imports.discard)
+        return first
+
+    async def _import_playlist(self, stream, first):
+        count = 1
+        try:
+            async for item in stream:
+                self.enqueue(item)
+                self._warm_favorite(item.webpage_url)
+                count += 1
+        except asyncio.CancelledError:
+            logger.info(f"📜 Çalma listesi aktarımı durduruldu ({count} şarkı)")
+            raise
+        except Exception as e:
+            logger.error(f"Çalma listesi aktarım hatası: {e}")
+        finally:
+            await stream.aclose()
+        logger.info(f"📜 Çalma listesi aktarıldı: {count} şarkı")
+
+    async def play_playlist(self, url):
+        logger.info(f"Çalma listesi açılıyor: {url}")
+        first = await self._open_playlist(url)
+        if first is None:
+            return None
+        return await self.play_music(first.webpage_url)
+
+    async def queue_playlist(self, url):
+        logger.info(f"Çalma listesi sıraya ekleniyor: {url}")
+        first = await self._open_playlist(url)
+        if first is None:
+            return None
+        position = self.enqueue(first)
+        self._warm_favorite(first.webpage_url)
+        return f"Sırada #{position}: çalma listesi aktarılıyor..."
+
+    def resolve_ahead(self):
+        if self._resolving and not self._resolving.done():
+            return
+        depth = self.config.get('PLAYLIST_RESOLVE_AHEAD', 2)
+        horizon = self.config.get('STREAM_REFRESH_AHEAD', 900)
+        candidates = self.queue[:depth]
+        if self.loop_mode and self.current_track:
+            candidates.append(self.current_track)
+        pending = [track for track in candidates if track.expired(horizon=horizon)]
+        if pending:
+            self._resolving = asyncio.create_task(self._resolve_pending(pending, horizon))
+
+    async def _resolve_pending(self, tracks, horizon=0):
+        for track in tracks:
+            try:
+                await self.bot.refresh_if_expired(track, urgent=False, horizon=horizon)
+            except Exception as e:
+                logger.error(f"Liste öğesi çözümleme hatası: {e}")
+            if not track.url and self.discard(track):
+                logger.warning(f"Çözümlenemeyen şarkı sıradan çıkarıldı: {track.title}")
+
+    def take_prefetched(self, track):
+        prefetched = self.prefetched
+        self.prefetched = None
+        if not prefetched:
+            return None
+        if prefetched['track'] is track:
+            return prefetched['source']
+        self._drop_prefetched(prefetched)
+        return None
+
+    def discard_prefetched(self):
+        prefetched = self.prefetched
+        self.prefetched = None
+        if prefetched:
+            self._drop_prefetched(prefetched)
+
+    def _drop_prefetched(self, prefetched):
+        mixer = self.playback.mixer
+        if mixer and mixer.staged is prefetched['source']:
+            mixer.stage(None)
+        else:
+            prefetched['source'].cleanup()
+
+    def _cache_path(self, track):
+        url = track.webpage_url
+        if not url or not self.song_cache.has(url):
+            return None
+        cache_path = self.song_cache.lookup(url)
+        return cache_path if cache_path and os.path.exists(cache_path) else None
+
+    def _open_prefetched(self, track, cache_path=None):
+        inner = self._cached_source(cache_path, 0, track.webpage_url) if cache_path else self._stream_source(track)
+        source = PrefetchedSource(inner, prebuffer_ms=self.config.get('PREFETCH_BUFFER_MS', 400))
+        source.cache_path = cache_path
+        source.prime()
+        return source
+
+    async def maybe_prefetch(self):
+        if not self.voice_client:
+            return
+        self.resolve_ahead()
+        if not self.playback.is_playing():
+            if not self.playback.is_paused():
+                self.discard_prefetched()
+            return
+        if self.duration <= 0:
+            return
+        lead = self.config.get('PREFETCH_SECONDS', 15)
+        crossfade_ms = self.config.get('CROSSFADE_MS', 0)
+        if self.loop_mode:
+            next_track = self._loop_target()
+        else:
+            next_track = self.queue[0] if self.queue else None
+        remaining = self.duration - self.get_elapsed_time()
+        if self.prefetched and (self.prefetched['track'] is not next_track or remaining > lead * 2):
+            self.discard_prefetched()
+        if self.prefetched and not self.prefetched['source'].cache_path and self.song_cache.has(next_track.webpage_url):
+            logger.info(f"💾 Sıradaki şarkı cache'e indi, stream yerine dosyadan hazırlanıyor: {next_track.title}")
+            self.discard_prefetched()
+        if self.prefetched and crossfade_ms > 0 and remaining * 1000 <= crossfade_ms:
+            if self._crossfade_generation != self.playback.generation:
+                self._crossfade_generation = self.playback.generation
+                await self.playback.run('crossfade', self.crossfade_to_next, crossfade_ms)
+            return
+        if next_track is None or self.prefetched or remaining > lead:
+            return
+        cache_path = self._cache_path(next_track)
+        if cache_path is None:
+            await self.bot.refresh_if_expired(next_track)
+        loop = asyncio.get_running_loop()
+        source = await loop.run_in_executor(None, self._open_prefetched, next_track, cache_path)
+        if not self.playback.is_playing():
+            source.cleanup()
+            return
+        self.prefetched = {'track': next_track, 'source': source}
+        if crossfade_ms <= 0:
+            self.playback.mixer.stage(source, gain=self.bot.track_gain(next_track.webpage_url) if cache_path else None)
+        logger.info(f"⏩ Sonraki şarkı hazır{' (cache)' if cache_path else ''}: {next_track.title} ({len(source.buffer) * 20}ms tampon)")
+
+    async def crossfade_to_next(self, fade_ms):
+        next_track = self._loop_target() if self.loop_mode else None
+        if next_track is None:
+            if not self.queue:
+                return
+            next_track = self.dequeue()
+        logger.info(f"🔀 Geçiş ({fade_ms}ms): {next_track.title}")
+        await self._play_next(next_track, fade_ms=fade_ms)
+
+    def _loop_target(self):
+        if self.current_track:
+            return self.current_track
+        if not self.current_url:
+            return None
+        track = self._loop_track
+        if track is None or track.webpage_url != self.current_url:
+            track = self._loop_track = Track(self.current_url, self.current_title, self.duration)
+        return track
+
+    async def _play_next(self, track, fade_ms=0):
+        prefetched = self.prefetched
+        if prefetched and prefetched['track'] is track and not prefetched['source'].cache_path \
+                and prefetched['source'] is not self.playback.current_source() and self._cache_path(track):
+            self.discard_prefetched()
+        source = self.take_prefetched(track)
+        cache_path = getattr(source, 'cache_path', None) or (self._cache_path(track) if source is None else None)
+        if cache_path:
+            return await self._play_cached(cache_path, track.webpage_url, track.title, track.duration, source=source, fade_ms=fade_ms)
+        return await self._play_url(track, source=source, fade_ms=fade_ms)
+
+    async def _play_url(self, track, start_sec=0, source=None, fade_ms=0):
+        if source is None:
+            try:
+                await self.bot.refresh_if_expired(track)
+            except Exception as e:
+                logger.error(f"Stream çözümleme hatası: {e}")
+            if not track.url:
+                logger.warning(f"Çalınamayan şarkı atlanıyor: {track.title}")
+                return None
+        self.current_track = track
+        self.current_title = track.title
+        self.current_url = track.webpage_url
+        self.duration = track.duration
+        self.start_offset = start_sec
+        self.is_playing_from_cache = False
+        self.publish_now_playing()
+        if start_sec == 0:
+            self.bot.record_play(self.current_url, self.current_title, self.duration)
+        if source is None:
+            source = self._stream_source(track, start_sec)
+        await self.playback.start(source, fade_ms=fade_ms, start_sec=start_sec)
+        self._watch_stream(source)
+        await self.bot.update_presence()
+        return self.current_title
+
+    async def advance(self, skip=False):
+        if not skip and await self._recover_stream():
+            return
+        self.stream_log = None
+        self._recoveries = 0
+        if self.loop_mode and not skip:
+            track = self._loop_target()
+            if track is not None and await self._play_next(track):
+                return
+        while self.queue:
+            if await self._play_next(self.dequeue()):
+                return
+        if skip:
+            await self.playback.stop()
+        self.playback.set_state(IDLE)
+        self.current_title = IDLE_TITLE
+        self.current_url = None
+        self.duration = 0
+        self.start_offset = 0
+        self.current_track = None
+        self.is_playing_from_cache = False
+        self.publish_now_playing()
+        self.last_active = time.monotonic()
+        await self.bot.update_presence()
+
+    async def skip_track(self):
+        if self.playback.is_playing():
+            await self.playback.run('skip', self.advance, skip=True)
+
+    def _warm_favorite(self, page_url):
+        fav = self.bot.favorites.get(page_url)
+        if fav and not self.song_cache.has(page_url):
+            self.bot.schedule_cache_download(page_url, fav.get('title'), PRIORITY_NEXT)
+
+    async def add_to_queue(self, query, network=False):
+        if is_playlist(query):
+            return await self.queue_playlist(query)
+        match = self.bot.local_match(query, network)
+        if match:
+            query = match.url
+        try:
+            logger.info(f"Sıraya ekleniyor: {query}")
+            info = await self.bot.resolve(query)
+            if not info:
+                return None
+            track = Track.from_info(info)
+            position = self.enqueue(track)
+            title = track.title
+            self._warm_favorite(track.webpage_url)
+            logger.info(f"✓ Sıraya eklendi: {title}")
+            short_title = title[:40] + "..." if len(title) > 40 else title
+            return f"Sırada #{position}: {short_title}"
+        except Exception as e:
+            logger.error(f"Sıraya ekleme hatası: {e}")
+            return None
+
+    def get_elapsed_time(self):
+        position = self.playback.position()
+        if position is None:
+            return int(self.start_offset)
+        return int(position)
+
+    def pause_music(self):
+        self.playback.pause()
+
+    def resume_music(self):
+        self.playback.resume()
+
+    async def set_volume(self, volume):
+        self.volume = volume
+        self.playback.set_volume(volume)
+
+    async def speak_text(self, text, language='auto', gender='female', pin=False):
+        try:
+            if not await self.playback.ensure_voice():
+                return False
+            started = time.perf_counter()
+            tts_config = self.config.get('TTS', {})
+            voice = choose_voice(tts_config, text, language, gender)
+            rate, pitch = tts_config.get('RATE', DEFAULT_RATE), tts_config.get('PITCH', DEFAULT_PITCH)
+            if tts_config.get('STREAMING', True):
+                tts_audio = await self.bot.tts.open(text, voice, rate, pitch, pin=pin)
+            else:
+                tts_audio = await self.bot.tts.get(text, voice, rate, pitch, pin=pin)
+            if not tts_audio:
+                return False
+            if isinstance(tts_audio, TTSStream):
+                tts_audio.task.add_done_callback(lambda task: self._log_tts_stream(tts_audio, task))
+                source = discord.FFmpegPCMAudio(tts_audio.pipe, pipe=True, executable=self.ffmpeg_path)
+            else:
+                source = discord.FFmpegPCMAudio(tts_audio, executable=self.ffmpeg_path)
+            first_audio, position = self.playback.speak(source)
+            first_audio.add_done_callback(lambda _: self.playback.record('tts_first_audio', started))
+            if position:
+                logger.info(f"🗣 TTS sıraya alındı (#{position}): {text[:40]}")
+            self.last_active = time.monotonic()
+            return True
+        except Exception as e:
+            logger.error(f"TTS Hatası: {e}")
+            return False
+
+    def _log_tts_stream(self, stream, task):
+        error = None if task.cancelled() else task.exception()
+        if error is not None:
+            logger.error(f"TTS akış hatası: {error}")
+            return
+        first = f"{stream.first_chunk_ms:.0f}ms" if stream.first_chunk_ms is not None else "-"
+        logger.info(f"🗣 TTS akışı: ilk parça {first}, toplam sentez {stream.total_ms:.0f}ms")
+        self.playback.latencies['tts_synthesis'].append(stream.total_ms)
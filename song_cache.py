@@ -0,0 +1,331 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+from resolve_cache import normalize_query
+from storage import write_json
+
+logger = logging.getLogger('MusicBot')
+
+INDEX_FILE = 'index.json'
+PCM_DIR = 'pcm'
+SAVE_INTERVAL = 30
+DEFAULT_BYTES_PER_SECOND = 24000
+
+
+def cache_key(url):
+    return normalize_query(url)
+
+
+def key_filename(key, ext='mp3'):
+    kind, _, ident = key.partition(':')
+    if kind == 'youtube' and ident and all(c.isalnum() or c in '-_' for c in ident):
+        return f"youtube_{ident}.{ext}"
+    return f"{kind}_{hashlib.sha1(key.encode()).hexdigest()[:20]}.{ext}"
+
+
+class CacheStore:
+    def __init__(self, cache_dir, max_bytes=2 * 1024 ** 3, pcm_max_bytes=0, pcm_min_hits=3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.pcm_dir = os.path.join(cache_dir, PCM_DIR)
+        self.pcm_max_bytes = pcm_max_bytes
+        self.pcm_min_hits = pcm_min_hits
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._dirty = False
+        self._last_save = 0.0
+        self._lock = threading.RLock()
+        os.makedirs(cache_dir, exist_ok=True)
+        if pcm_max_bytes > 0:
+            os.makedirs(self.pcm_dir, exist_ok=True)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            self.entries = raw.get('entries', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Cache indeksi okunamadı: {e}")
+
+    def save(self, force=True):
+        with self._lock:
+            if not force and (not self._dirty or time.time() - self._last_save < SAVE_INTERVAL):
+                return
+            try:
+                write_json(self.index_path, {'entries': self.entries})
+                self._dirty = False
+                self._last_save = time.time()
+            except Exception as e:
+                logger.error(f"Cache indeksi kaydedilemedi: {e}")
+
+    def path_for(self, url, ext='mp3'):
+        key = cache_key(url)
+        entry = self.entries.get(key)
+        filename = entry['file'] if entry else key_filename(key, ext)
+        return os.path.join(self.cache_dir, filename)
+
+    def has(self, url):
+        return cache_key(url) in self.entries
+
+    def lookup(self, url):
+        key = cache_key(url)
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                self.misses += 1
+                return None
+            entry['last_access'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+            self.hits += 1
+            self._dirty = True
+        self.save(force=False)
+        return os.path.join(self.cache_dir, entry['file'])
+
+    def get(self, url):
+        return self.entries.get(cache_key(url))
+
+    def add(self, url, path, title=None, duration=0, codec=None, pinned=False):
+        if not os.path.exists(path):
+            return None
+        key = cache_key(url)
+        now = time.time()
+        with self._lock:
+            previous = self.entries.get(key, {})
+            self.entries[key] = {
+                'file': os.path.basename(path),
+                'url': url,
+                'title': title or previous.get('title'),
+                'size': os.path.getsize(path),
+                'duration': duration or previous.get('duration', 0),
+                'codec': codec or previous.get('codec'),
+                'created': previous.get('created', now),
+                'last_access': now,
+                'hits': previous.get('hits', 0),
+                'pinned': pinned or previous.get('pinned', False)
+            }
+            if previous.get('lufs') is not None:
+                self.entries[key]['lufs'] = previous['lufs']
+                self.entries[key]['normalized'] = previous.get('normalized', False)
+            if previous.get('pcm'):
+                self.entries[key]['pcm'] = previous['pcm']
+                self.entries[key]['pcm_size'] = previous.get('pcm_size', 0)
+            self._dirty = True
+        self.evict()
+        self.save()
+        return path
+
+    def pin(self, url, pinned=True):
+        with self._lock:
+            entry = self.entries.get(cache_key(url))
+            if entry and entry.get('pinned') != pinned:
+                entry['pinned'] = pinned
+                self._dirty = True
+        self.save()
+
+    def set_title(self, url, title):
+        with self._lock:
+            entry = self.entries.get(cache_key(url))
+            if entry:
+                entry['title'] = title
+                self._dirty = True
+
+    def set_loudness(self, url, lufs, normalized=False):
+        with self._lock:
+            entry = self.entries.get(cache_key(url))
+            if not entry:
+                return False
+            entry['lufs'] = round(lufs, 2)
+            if normalized:
+                entry['normalized'] = True
+                entry['size'] = os.path.getsize(os.path.join(self.cache_dir, entry['file']))
+                self._delete_pcm(entry)
+            self._dirty = True
+        self.save(force=False)
+        return True
+
+    def loudness(self, url):
+        entry = self.entries.get(cache_key(url))
+        return entry.get('lufs') if entry else None
+
+    def remove(self, url):
+        with self._lock:
+            entry = self.entries.pop(cache_key(url), None)
+        if entry:
+            self._delete_file(entry['file'])
+            self._delete_pcm(entry)
+            self.save()
+
+    def pcm_enabled(self):
+        return self.pcm_max_bytes > 0
+
+    def pcm_path_for(self, url):
+        return os.path.join(self.pcm_dir, key_filename(cache_key(url), 'pcm'))
+
+    def pcm_lookup(self, url):
+        entry = self.entries.get(cache_key(url))
+        if not entry or not entry.get('pcm'):
+            return None
+        path = os.path.join(self.pcm_dir, entry['pcm'])
+        return path if os.path.exists(path) else None
+
+    def wants_pcm(self, url):
+        entry = self.entries.get(cache_key(url))
+        if not self.pcm_enabled() or not entry or entry.get('pcm'):
+            return False
+        return entry.get('pinned') or entry.get('hits', 0) >= self.pcm_min_hits
+
+    def add_pcm(self, url, path):
+        with self._lock:
+            entry = self.entries.get(cache_key(url))
+            if not entry or not os.path.exists(path):
+                return None
+            entry['pcm'] = os.path.basename(path)
+            entry['pcm_size'] = os.path.getsize(path)
+            self._dirty = True
+        self.evict_pcm()
+        self.save()
+        return path
+
+    def pcm_bytes(self):
+        return sum(e.get('pcm_size', 0) for e in self.entries.values() if e.get('pcm'))
+
+    def evict_pcm(self):
+        with self._lock:
+            total = self.pcm_bytes()
+            if total <= self.pcm_max_bytes:
+                return 0
+            candidates = sorted(
+                (e for e in self.entries.values() if e.get('pcm')),
+                key=lambda e: e.get('last_access', 0)
+            )
+            demoted = []
+            for entry in candidates:
+                if total <= self.pcm_max_bytes:
+                    break
+                total -= entry.get('pcm_size', 0)
+                demoted.append(entry)
+        for entry in demoted:
+            self._delete_pcm(entry)
+        if demoted:
+            logger.info(f"🧹 PCM katmanı: {len(demoted)} şarkı sıkıştırılmış dosyaya geri düşürüldü ({total / 1024 ** 2:.0f} MB kaldı)")
+        return len(demoted)
+
+    def _delete_pcm(self, entry):
+        filename = entry.pop('pcm', None)
+        entry.pop('pcm_size', None)
+        if not filename:
+            return
+        try:
+            os.remove(os.path.join(self.pcm_dir, filename))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"PCM silme hatası: {e}")
+        self._dirty = True
+
+    def total_bytes(self):
+        return sum(e.get('size', 0) for e in self.entries.values())
+
+    def bytes_per_second(self):
+        timed = [e for e in self.entries.values() if e.get('duration') and e.get('size')]
+        seconds = sum(e['duration'] for e in timed)
+        return sum(e['size'] for e in timed) / seconds if seconds else DEFAULT_BYTES_PER_SECOND
+
+    def evict(self, budget=None, keep=()):
+        budget = self.max_bytes if budget is None else budget
+        with self._lock:
+            total = self.total_bytes()
+            if total <= budget:
+                return 0
+            candidates = sorted(
+                (k for k, e in self.entries.items() if not e.get('pinned') and k not in keep),
+                key=lambda k: self.entries[k].get('last_access', 0)
+            )
+            removed = []
+            for key in candidates:
+                if total <= budget:
+                    break
+                entry = self.entries.pop(key)
+                total -= entry.get('size', 0)
+                removed.append(entry)
+            self._dirty = True
+        for entry in removed:
+            self._delete_file(entry['file'])
+            self._delete_pcm(entry)
+        self.evicted += len(removed)
+        if removed:
+            logger.info(f"🧹 Cache bütçesi aşıldı, {len(removed)} dosya silindi ({total / 1024 ** 2:.0f} MB kaldı)")
+        if total > budget and not keep:
+            logger.warning(f"Sabitlenmiş favoriler cache bütçesini aşıyor ({total / 1024 ** 2:.0f} MB)")
+        return len(removed)
+
+    def reconcile(self):
+        with self._lock:
+            missing = [k for k, e in self.entries.items() if not os.path.exists(os.path.join(self.cache_dir, e['file']))]
+            for key in missing:
+                del self.entries[key]
+            for entry in self.entries.values():
+                if entry.get('pcm') and not os.path.exists(os.path.join(self.pcm_dir, entry['pcm'])):
+                    entry.pop('pcm', None)
+                    entry.pop('pcm_size', None)
+        known = {e['file'] for e in self.entries.values()}
+        known_pcm = {e['pcm'] for e in self.entries.values() if e.get('pcm')}
+        cleaned = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename in known or filename == INDEX_FILE or filename.endswith(('.tmp', '.part', '.ytdl')):
+                continue
+            if os.path.isdir(os.path.join(self.cache_dir, filename)):
+                continue
+            if self._delete_file(filename):
+                cleaned += 1
+        if os.path.isdir(self.pcm_dir):
+            for filename in os.listdir(self.pcm_dir):
+                if filename not in known_pcm and self._delete_file(os.path.join(PCM_DIR, filename)):
+                    cleaned += 1
+        if missing or cleaned:
+            logger.info(f"🧹 Cache indeksi eşitlendi: {len(missing)} kayıp kayıt, {cleaned} sahipsiz dosya")
+            self._dirty = True
+            self.save()
+
+    def adopt(self, url, legacy_path, title=None, duration=0, pinned=False):
+        target = self.path_for(url, os.path.splitext(legacy_path)[1].lstrip('.') or 'mp3')
+        try:
+            os.replace(legacy_path, target)
+        except Exception as e:
+            logger.warning(f"Eski cache dosyası taşınamadı: {e}")
+            return None
+        return self.add(url, target, title=title, duration=duration, codec='mp3', pinned=pinned)
+
+    def _delete_file(self, filename):
+        try:
+            os.remove(os.path.join(self.cache_dir, filename))
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"Cache silme hatası: {e}")
+            return False
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes(),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evicted': self.evicted,
+            'pcm_bytes': self.pcm_bytes(),
+            'pcm_max_bytes': self.pcm_max_bytes
+        }
@@ -0,0 +1,32 @@
+import threading
+from collections import deque
+
+INSERT = 'insert'
+REMOVE = 'remove'
+UPDATE = 'update'
+RESET = 'reset'
+SET = 'set'
+
+
+class ChangeFeed:
+    def __init__(self, maxlen=512):
+        self.lock = threading.RLock()
+        self._events = deque(maxlen=maxlen)
+        self.version = 0
+
+    def publish(self, topic, op, index=None, value=None):
+        with self.lock:
+            self.version += 1
+            self._events.append((self.version, topic, op, index, value))
+            return self.version
+
+    def since(self, version):
+        with self.lock:
+            if version >= self.version:
+                return [], True
+            complete = bool(self._events) and self._events[0][0] <= version + 1
+            return [e for e in self._events if e[0] > version], complete
+
+    def snapshot(self, read):
+        with self.lock:
+            return self.version, read()
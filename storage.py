@@ -0,0 +1,67 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger('MusicBot')
+
+JOURNAL_SUFFIX = '.journal'
+
+
+def write_json(path, data, durable=False, **options):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **options)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Journal:
+    def __init__(self, path, name, durable=False):
+        self.path = path
+        self.name = name
+        self.durable = durable
+        self.pending = 0
+        self._file = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def replay(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"{self.name} günlüğünün yarım kalan son satırı atlandı")
+                        return
+                    yield entry
+        except FileNotFoundError:
+            return
+
+    def append(self, entry):
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+            if self.durable:
+                os.fsync(self._file.fileno())
+        except Exception as e:
+            logger.error(f"{self.name} günlüğü yazılamadı: {e}")
+        self.pending += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.pending = 0
@@ -0,0 +1,62 @@
+import sys
+import time
+
+from resolve_cache import stream_expiry, STREAM_SAFETY_MARGIN
+
+MAX_SHARED_HEADERS = 64
+_headers = {}
+
+
+def shared_headers(headers):
+    if not headers:
+        return None
+    key = tuple(sorted(headers.items()))
+    shared = _headers.get(key)
+    if shared is None:
+        if len(_headers) >= MAX_SHARED_HEADERS:
+            _headers.clear()
+        shared = _headers[key] = dict(headers)
+    return shared
+
+
+class Track:
+    __slots__ = ('id', 'title', 'duration', 'webpage_url', 'url', 'http_headers', 'expires')
+
+    def __init__(self, webpage_url, title=None, duration=0, id=None):
+        self.id = sys.intern(id) if id else None
+        self.title = title or webpage_url or 'Bilinmiyor'
+        self.duration = int(duration or 0)
+        self.webpage_url = webpage_url
+        self.url = None
+        self.http_headers = None
+        self.expires = 0.0
+
+    @classmethod
+    def from_info(cls, info):
+        track = cls(info.get('webpage_url'), info.get('title'), info.get('duration'), info.get('id'))
+        track.rehydrate(info)
+        return track
+
+    def rehydrate(self, info):
+        if not info or not info.get('url'):
+            return False
+        self.url = info['url']
+        self.http_headers = shared_headers(info.get('http_headers'))
+        self.expires = stream_expiry(self.url, extractor=info.get('extractor_key'))
+        if info.get('title'):
+            self.title = info['title']
+        if info.get('duration'):
+            self.duration = int(info['duration'])
+        return True
+
+    def expired(self, now=None, horizon=0):
+        return not self.url or self.expires - STREAM_SAFETY_MARGIN - horizon <= (now or time.time())
+
+    def header_block(self):
+        return "".join(f"{k}: {v}\r\n" for k, v in (self.http_headers or {}).items())
+
+    def to_dict(self):
+        return {'title': self.title, 'duration': self.duration, 'webpage_url': self.webpage_url}
+
+    def __repr__(self):
+        return f"Track({self.title!r}, {self.webpage_url!r})"
@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import deque
+
+from storage import write_json
+
+logger = logging.getLogger('MusicBot')
+
+INDEX_FILE = 'index.json'
+DEFAULT_RATE = '+0%'
+DEFAULT_PITCH = '+0Hz'
+TURKISH_CHARS = set('çğıöşüÇĞİÖŞÜ')
+
+
+def normalize_text(text):
+    return " ".join(unicodedata.normalize('NFC', text).split())
+
+
+def tts_key(text, voice, rate=DEFAULT_RATE, pitch=DEFAULT_PITCH):
+    raw = "\x1f".join((voice, rate, pitch, normalize_text(text)))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def choose_voice(tts_config, text, language='auto', gender='female'):
+    male = gender == 'male'
+    voice_tr = tts_config.get('VOICE_TR_MALE', "tr-TR-AhmetNeural") if male else tts_config.get('VOICE_TR', "tr-TR-EmelNeural")
+    voice_en = tts_config.get('VOICE_EN_MALE', "en-US-GuyNeural") if male else tts_config.get('VOICE_EN', "en-US-AriaNeural")
+    if language == 'auto':
+        return voice_tr if any(char in TURKISH_CHARS for char in text) else voice_en
+    return voice_tr if language == 'tr' else voice_en
+
+
+class EdgeSynthesizer:
+    async def stream(self, text, voice, rate, pitch):
+        import edge_tts
+        async for chunk in edge_tts.Communicate(text, voice, rate=rate, pitch=pitch).stream():
+            if chunk['type'] == 'audio':
+                yield chunk['data']
+
+    async def synthesize(self, text, voice, rate, pitch, path):
+        with open(path, 'wb') as f:
+            async for data in self.stream(text, voice, rate, pitch):
+                f.write(data)
+
+
+class ChunkPipe:
+    def __init__(self):
+        self._chunks = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def write(self, data):
+        with self._cond:
+            self._chunks.append(data)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def read(self, size=-1):
+        with self._cond:
+            while not self._chunks and not self._closed:
+                self._cond.wait()
+            if not self._chunks:
+                return b''
+            data = self._chunks.popleft()
+            if 0 < size < len(data):
+                self._chunks.appendleft(data[size:])
+                data = data[:size]
+            return data
+
+
+class TTSStream:
+    def __init__(self):
+        self.pipe = ChunkPipe()
+        self.started = time.perf_counter()
+        self.first_chunk_ms = None
+        self.total_ms = None
+        self.task = None
+
+
+class TTSCache:
+    def __init__(self, cache_dir, synthesizer=None, max_bytes=64 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.synthesizer = synthesizer or EdgeSynthesizer()
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, INDEX_FILE)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.synthesized = 0
+        self.synth_time = 0.0
+        self._inflight = {}
+        self._lock = threading.RLock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('entries', {})
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"TTS cache indeksi okunamadı: {e}")
+        missing = [k for k, e in self.entries.items() if not os.path.exists(os.path.join(self.cache_dir, e['file']))]
+        for key in missing:
+            del self.entries[key]
+
+    def save(self):
+        with self._lock:
+            try:
+                write_json(self.index_path, {'entries': self.entries})
+            except Exception as e:
+                logger.error(f"TTS cache indeksi kaydedilemedi: {e}")
+
+    def lookup(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            path = os.path.join(self.cache_dir, entry['file'])
+            if not os.path.exists(path):
+                del self.entries[key]
+                return None
+            entry['last_access'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+            return path
+
+    async def get(self, text, voice, rate=DEFAULT_RATE, pitch=DEFAULT_PITCH, pin=False):
+        key = tts_key(text, voice, rate, pitch)
+        path = self.lookup(key)
+        if path:
+            self.hits += 1
+            if pin:
+                self.pin(key)
+            return path
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._synthesize(key, text, voice, rate, pitch, pin))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def open(self, text, voice, rate=DEFAULT_RATE, pitch=DEFAULT_PITCH, pin=False):
+        key = tts_key(text, voice, rate, pitch)
+        if key in self._inflight or self.lookup(key) or not hasattr(self.synthesizer, 'stream'):
+            return await self.get(text, voice, rate, pitch, pin)
+        self.misses += 1
+        stream = TTSStream()
+        stream.task = asyncio.ensure_future(self._synthesize(key, text, voice, rate, pitch, pin, stream))
+        self._inflight[key] = stream.task
+        stream.task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return stream
+
+    async def _write_stream(self, text, voice, rate, pitch, tmp_path, stream):
+        try:
+            with open(tmp_path, 'wb') as f:
+                async for data in self.synthesizer.stream(text, voice, rate, pitch):
+                    if stream.first_chunk_ms is None:
+                        stream.first_chunk_ms = (time.perf_counter() - stream.started) * 1000
+                    f.write(data)
+                    stream.pipe.write(data)
+        finally:
+            stream.pipe.close()
+            stream.total_ms = (time.perf_counter() - stream.started) * 1000
+
+    async def _synthesize(self, key, text, voice, rate, pitch, pin, stream=None):
+        filename = f"{key}.mp3"
+        path = os.path.join(self.cache_dir, filename)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        started = time.perf_counter()
+        try:
+            if stream is not None:
+                await self._write_stream(normalize_text(text), voice, rate, pitch, tmp_path, stream)
+            else:
+                await self.synthesizer.synthesize(normalize_text(text), voice, rate, pitch, tmp_path)
+            if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+                logger.error("TTS dosyası oluşturulamadı!")
+                return None
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        elapsed = time.perf_counter() - started
+        self.synthesized += 1
+        self.synth_time += elapsed
+        now = time.time()
+        with self._lock:
+            self.entries[key] = {
+                'file': filename,
+                'text': normalize_text(text)[:200],
+                'voice': voice,
+                'rate': rate,
+                'pitch': pitch,
+                'size': os.path.getsize(path),
+                'created': now,
+                'last_access': now,
+                'hits': 0,
+                'pinned': pin
+            }
+        logger.info(f"🗣 TTS sentezlendi ({elapsed * 1000:.0f}ms, {voice}): {normalize_text(text)[:40]}")
+        self.evict()
+        self.save()
+        return path
+
+    def pin(self, key, pinned=True):
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry or entry.get('pinned') == pinned:
+                return False
+            entry['pinned'] = pinned
+        self.save()
+        return True
+
+    async def preload(self, phrases, voice_for, rate=DEFAULT_RATE, pitch=DEFAULT_PITCH):
+        ready = 0
+        for text in phrases:
+            try:
+                if await self.get(text, voice_for(text), rate, pitch, pin=True):
+                    ready += 1
+            except Exception as e:
+                logger.warning(f"TTS ön sentez hatası ({text[:30]}): {e}")
+        if phrases:
+            logger.info(f"🗣 {ready}/{len(phrases)} sabit TTS ifadesi hazır")
+        return ready
+
+    def total_bytes(self):
+        return sum(e.get('size', 0) for e in self.entries.values())
+
+    def evict(self):
+        with self._lock:
+            total = self.total_bytes()
+            if total <= self.max_bytes:
+                return 0
+            candidates = sorted(
+                (k for k, e in self.entries.items() if not e.get('pinned')),
+                key=lambda k: self.entries[k].get('last_access', 0)
+            )
+            removed = []
+            for key in candidates:
+                if total <= self.max_bytes:
+                    break
+                entry = self.entries.pop(key)
+                total -= entry.get('size', 0)
+                removed.append(entry)
+        for entry in removed:
+            try:
+                os.remove(os.path.join(self.cache_dir, entry['file']))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.error(f"TTS cache silme hatası: {e}")
+        self.evicted += len(removed)
+        return len(removed)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'bytes': self.total_bytes(),
+            'max_bytes': self.max_bytes,
+            'pinned': sum(1 for e in self.entries.values() if e.get('pinned')),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'evicted': self.evicted,
+            'synthesized': self.synthesized,
+            'avg_synth_ms': (self.synth_time / self.synthesized * 1000) if self.synthesized else 0.0
+        }